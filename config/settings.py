@@ -3,12 +3,66 @@ Centralized configuration management using Pydantic Settings.
 Loads configuration from environment variables with validation.
 """
 
-from typing import List, Optional
-from pydantic import Field, field_validator
-from pydantic_settings import BaseSettings, SettingsConfigDict
-
-
-class LLMSettings(BaseSettings):
+import hashlib
+import json
+import os
+import tempfile
+from functools import cached_property
+from pathlib import Path
+from typing import Annotated, Any, Dict, List, Optional, Tuple, Type, get_args
+from dotenv import dotenv_values
+from pydantic import BaseModel, Field, computed_field
+from pydantic.fields import FieldInfo
+from pydantic_settings import (
+    BaseSettings,
+    PydanticBaseSettingsSource,
+    SettingsConfigDict,
+)
+
+# Float constrained to [0.0, 1.0], enforced by pydantic-core without a Python validator
+UnitFloat = Annotated[float, Field(ge=0.0, le=1.0)]
+
+# .env is parsed once per process and shared by every settings section
+DOTENV_VALUES: Dict[str, str] = {
+    key.lower(): value for key, value in dotenv_values(".env").items() if value is not None
+}
+
+
+class CachedDotEnvSource(PydanticBaseSettingsSource):
+    """Settings source backed by the pre-parsed .env values."""
+    
+    def get_field_value(self, field: FieldInfo, field_name: str) -> Tuple[Any, str, bool]:
+        value = DOTENV_VALUES.get(field_name.lower())
+        return value, field_name, self.field_is_complex(field)
+    
+    def __call__(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        for field_name, field in self.settings_cls.model_fields.items():
+            value, _, is_complex = self.get_field_value(field, field_name)
+            if value is None:
+                continue
+            if is_complex:
+                value = self.decode_complex_value(field_name, field, value)
+            data[field_name] = value
+        return data
+
+
+class EnvSettings(BaseSettings):
+    """Base for settings sections: init kwargs > environment > .env > secrets."""
+    
+    @classmethod
+    def settings_customise_sources(
+        cls,
+        settings_cls: Type[BaseSettings],
+        init_settings: PydanticBaseSettingsSource,
+        env_settings: PydanticBaseSettingsSource,
+        dotenv_settings: PydanticBaseSettingsSource,
+        file_secret_settings: PydanticBaseSettingsSource,
+    ) -> Tuple[PydanticBaseSettingsSource, ...]:
+        return init_settings, env_settings, CachedDotEnvSource(settings_cls), file_secret_settings
+
+
+class LLMSettings(EnvSettings):
     """LLM and Embedding Model Configuration"""
     
     openai_api_key: str = Field(..., description="OpenAI API Key")
@@ -21,7 +75,7 @@ class LLMSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="")
 
 
-class MilvusSettings(BaseSettings):
+class MilvusSettings(EnvSettings):
     """Milvus Vector Database Configuration"""
     
     milvus_host: str = Field(default="localhost", description="Milvus host")
@@ -40,7 +94,7 @@ class MilvusSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="")
 
 
-class ElasticsearchSettings(BaseSettings):
+class ElasticsearchSettings(EnvSettings):
     """Elasticsearch Configuration"""
     
     elasticsearch_host: str = Field(default="localhost", description="Elasticsearch host")
@@ -52,25 +106,18 @@ class ElasticsearchSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="")
 
 
-class HybridSearchSettings(BaseSettings):
+class HybridSearchSettings(EnvSettings):
     """Hybrid Search Configuration"""
     
     rrf_k_constant: int = Field(default=60, description="RRF k constant")
-    semantic_weight: float = Field(default=0.5, description="Weight for semantic search")
-    lexical_weight: float = Field(default=0.5, description="Weight for lexical search")
+    semantic_weight: UnitFloat = Field(default=0.5, description="Weight for semantic search")
+    lexical_weight: UnitFloat = Field(default=0.5, description="Weight for lexical search")
     top_k_results: int = Field(default=5, description="Number of results to return")
     
-    @field_validator('semantic_weight', 'lexical_weight')
-    @classmethod
-    def validate_weights(cls, v: float) -> float:
-        if not 0.0 <= v <= 1.0:
-            raise ValueError("Weights must be between 0.0 and 1.0")
-        return v
-    
     model_config = SettingsConfigDict(env_prefix="")
 
 
-class PostgresSettings(BaseSettings):
+class PostgresSettings(EnvSettings):
     """PostgreSQL with pgvector Configuration"""
     
     postgres_host: str = Field(default="localhost", description="PostgreSQL host")
@@ -79,15 +126,33 @@ class PostgresSettings(BaseSettings):
     postgres_user: str = Field(default="postgres", description="PostgreSQL username")
     postgres_password: str = Field(default="postgres", description="PostgreSQL password")
     postgres_pool_size: int = Field(default=10, description="Connection pool size")
-    
-    @property
+    hnsw_ef_search: int = Field(default=40, description="pgvector HNSW candidate list size for memory search")
+    hnsw_iterative_scan: bool = Field(default=False, description="Use pgvector 0.8+ iterative HNSW scans for filtered search")
+    postgres_write_batch_size: int = Field(default=100, description="Max interactions per batched COPY")
+    postgres_write_interval_ms: int = Field(default=50, description="Max wait in ms to fill a write batch")
+    postgres_write_queue_size: int = Field(default=10000, description="Max interactions queued for writing before new ones are dropped")
+    
+    @computed_field
+    @cached_property
     def database_url(self) -> str:
         return f"postgresql://{self.postgres_user}:{self.postgres_password}@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
     
     model_config = SettingsConfigDict(env_prefix="")
 
 
-class SnowflakeSettings(BaseSettings):
+class Neo4jSettings(EnvSettings):
+    """Neo4j Knowledge Graph Configuration"""
+    
+    neo4j_uri: str = Field(default="bolt://localhost:7687", description="Neo4j Bolt URI")
+    neo4j_user: str = Field(default="neo4j", description="Neo4j username")
+    neo4j_password: str = Field(default="password", description="Neo4j password")
+    neo4j_pool_size: int = Field(default=64, description="Max Bolt connections in the driver pool")
+    neo4j_acquisition_timeout: float = Field(default=30.0, description="Seconds to wait for a pooled connection")
+    
+    model_config = SettingsConfigDict(env_prefix="")
+
+
+class SnowflakeSettings(EnvSettings):
     """Snowflake Data Warehouse Configuration"""
     
     snowflake_account: str = Field(..., description="Snowflake account identifier")
@@ -100,33 +165,41 @@ class SnowflakeSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="")
 
 
-class ChunkingSettings(BaseSettings):
+class ChunkingSettings(EnvSettings):
     """Document Chunking Configuration"""
     
     chunk_size: int = Field(default=512, description="Child chunk size in tokens")
     chunk_overlap: int = Field(default=100, description="Overlap between chunks")
     parent_chunk_size: int = Field(default=2048, description="Parent chunk size")
     semantic_similarity_threshold: float = Field(default=0.6, description="Threshold for semantic chunking")
+    embedding_cache_path: str = Field(default="~/.cache/rag-embed/embeddings.sqlite3", description="On-disk cache for chunk embeddings")
+    extraction_cache_path: str = Field(default="~/.cache/rag-embed/graph_extractions.sqlite3", description="On-disk cache for graph extraction results")
+    caption_cache_path: str = Field(default="~/.cache/rag-embed/vlm_captions.json", description="On-disk copy of the VLM image caption cache")
     
     model_config = SettingsConfigDict(env_prefix="")
 
 
-class LangGraphSettings(BaseSettings):
+class LangGraphSettings(EnvSettings):
     """LangGraph Agentic Orchestration Configuration"""
     
     max_iterations: int = Field(default=3, description="Max iterations for self-correction")
     relevance_threshold: float = Field(default=0.7, description="Relevance score threshold")
     hallucination_check_enabled: bool = Field(default=True, description="Enable hallucination checking")
+    max_concurrent_graders: int = Field(default=5, description="Max concurrent document grading calls")
     
     model_config = SettingsConfigDict(env_prefix="")
 
 
-class APISettings(BaseSettings):
+class APISettings(EnvSettings):
     """API Server Configuration"""
     
     api_host: str = Field(default="0.0.0.0", description="API host")
     api_port: int = Field(default=8000, description="API port")
     api_workers: int = Field(default=4, description="Number of workers")
+    ws_max_size: int = Field(default=4 * 1024 * 1024, description="Max WebSocket message size in bytes")
+    ws_ping_interval: float = Field(default=20.0, description="WebSocket keepalive ping interval in seconds")
+    ingest_workers: int = Field(default_factory=lambda: os.cpu_count() or 1, description="Max threads for CPU-bound ingestion work")
+    ingest_max_parallel_docs: int = Field(default=4, description="Documents in flight at once during batch ingestion")
     cors_origins: List[str] = Field(default=["http://localhost:3000"], description="CORS origins")
     jwt_secret_key: str = Field(..., description="JWT secret key")
     jwt_algorithm: str = Field(default="HS256", description="JWT algorithm")
@@ -135,7 +208,7 @@ class APISettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="")
 
 
-class ObservabilitySettings(BaseSettings):
+class ObservabilitySettings(EnvSettings):
     """Observability and Monitoring Configuration"""
     
     otel_exporter_otlp_endpoint: str = Field(default="http://localhost:4317", description="OTLP endpoint")
@@ -147,7 +220,7 @@ class ObservabilitySettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="")
 
 
-class StorageSettings(BaseSettings):
+class StorageSettings(EnvSettings):
     """Storage Configuration"""
     
     document_storage_path: str = Field(default="/data/documents", description="Document storage path")
@@ -157,7 +230,7 @@ class StorageSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="")
 
 
-class FeatureFlagsSettings(BaseSettings):
+class FeatureFlagsSettings(EnvSettings):
     """Feature Flags"""
     
     enable_web_search: bool = Field(default=False, description="Enable web search fallback")
@@ -169,7 +242,7 @@ class FeatureFlagsSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="")
 
 
-class RedisSettings(BaseSettings):
+class RedisSettings(EnvSettings):
     """Redis Configuration"""
     
     host: str = Field(default="localhost", description="Redis host")
@@ -177,11 +250,19 @@ class RedisSettings(BaseSettings):
     db: int = Field(default=0, description="Redis DB index")
     password: Optional[str] = Field(default=None, description="Redis password")
     ttl: int = Field(default=3600, description="Default TTL")
+    l1_size: int = Field(default=1024, description="Max entries in the in-process L1 cache")
+    l1_ttl: int = Field(default=60, description="TTL in seconds for the in-process L1 cache")
+    embedding_ttl: int = Field(default=604800, description="TTL in seconds for cached query embeddings")
+    adaptive_ttl_max: int = Field(default=86400, description="Upper bound for frequency-scaled TTLs")
+    hot_query_count: int = Field(default=50, description="Hot queries refreshed before their cached answers expire")
+    hot_query_refresh_interval: int = Field(default=300, description="Seconds between hot-query refresh passes (0 disables)")
+    warmup_queries: int = Field(default=100, description="Recent queries to pre-execute at startup (0 disables)")
+    warmup_concurrency: int = Field(default=10, description="Max concurrent workflow runs while warming")
     
     model_config = SettingsConfigDict(env_prefix="")
 
 
-class VoiceSettings(BaseSettings):
+class VoiceSettings(EnvSettings):
     """Voice Services Configuration"""
     
     stt_provider: str = Field(default="openai", description="Speech-to-Text provider (openai, local_whisper)")
@@ -189,11 +270,15 @@ class VoiceSettings(BaseSettings):
     elevenlabs_api_key: Optional[str] = Field(default=None, description="ElevenLabs API key")
     default_voice_id: str = Field(default="alloy", description="Default voice ID")
     enable_voice_interface: bool = Field(default=True, description="Enable voice interface")
+    max_sessions: int = Field(default=10000, description="Max tracked voice sessions")
+    session_ttl: int = Field(default=3600, description="Seconds a voice session stays registered")
+    session_idle_timeout: float = Field(default=300.0, description="Close voice sockets idle for this many seconds")
+    send_queue_size: int = Field(default=8, description="Outbound voice frames buffered per session")
     
     model_config = SettingsConfigDict(env_prefix="")
 
 
-class LocalLLMSettings(BaseSettings):
+class LocalLLMSettings(EnvSettings):
     """Local LLM Configuration"""
     
     ollama_base_url: str = Field(default="http://localhost:11434", description="Ollama server URL")
@@ -206,7 +291,7 @@ class LocalLLMSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="")
 
 
-class PrivacySettings(BaseSettings):
+class PrivacySettings(EnvSettings):
     """Privacy and PII Masking Configuration"""
     
     privacy_mode: bool = Field(default=False, description="Enable privacy mode")
@@ -226,6 +311,7 @@ class Settings(BaseSettings):
     elasticsearch: ElasticsearchSettings = Field(default_factory=ElasticsearchSettings)
     hybrid_search: HybridSearchSettings = Field(default_factory=HybridSearchSettings)
     postgres: PostgresSettings = Field(default_factory=PostgresSettings)
+    neo4j: Neo4jSettings = Field(default_factory=Neo4jSettings)
     snowflake: Optional[SnowflakeSettings] = None
     chunking: ChunkingSettings = Field(default_factory=ChunkingSettings)
     langgraph: LangGraphSettings = Field(default_factory=LangGraphSettings)
@@ -238,13 +324,77 @@ class Settings(BaseSettings):
     local_llm: LocalLLMSettings = Field(default_factory=LocalLLMSettings)
     privacy: PrivacySettings = Field(default_factory=PrivacySettings)
     
+    # Sections read .env through CachedDotEnvSource; the container itself has no
+    # fields sourced from .env, so it does not parse the file again
     model_config = SettingsConfigDict(
-        env_file=".env",
-        env_file_encoding="utf-8",
         case_sensitive=False,
         extra="ignore"
     )
 
 
+def _settings_cache_key() -> str:
+    """Hash of every input Settings reads from: the environment and the .env file."""
+    digest = hashlib.sha256()
+    for key, value in sorted(os.environ.items()):
+        digest.update(f"{key}={value}\n".encode("utf-8"))
+    env_file = Path(".env")
+    if env_file.exists():
+        digest.update(env_file.read_bytes())
+    return digest.hexdigest()
+
+
+def _construct_settings(data: Dict[str, Any]) -> Settings:
+    """Rebuild Settings from a validated dump without re-running validation."""
+    values = {}
+    for name, field in Settings.model_fields.items():
+        if name not in data:
+            continue
+        value = data[name]
+        if isinstance(value, dict):
+            # model_construct does not recurse, so build nested sections explicitly
+            section_cls = next(
+                arg for arg in (field.annotation, *get_args(field.annotation))
+                if isinstance(arg, type) and issubclass(arg, BaseModel)
+            )
+            value = section_cls.model_construct(**value)
+        values[name] = value
+    return Settings.model_construct(**values)
+
+
+def load_settings() -> Settings:
+    """
+    Load settings, optionally reusing a previously validated snapshot.
+    
+    With SETTINGS_FAST_LOAD=1 the validated settings are cached on disk keyed by
+    a hash of the environment, and later processes with an identical environment
+    (e.g. re-forked workers) skip validation via model_construct.
+    """
+    if os.getenv("SETTINGS_FAST_LOAD") != "1":
+        return Settings()
+    
+    cache_path = Path(os.getenv(
+        "SETTINGS_CACHE_PATH",
+        os.path.join(tempfile.gettempdir(), ".rag_settings_cache.json")
+    ))
+    cache_key = _settings_cache_key()
+    
+    try:
+        cached = json.loads(cache_path.read_text(encoding="utf-8"))
+        if cached.get("key") == cache_key:
+            return _construct_settings(cached["settings"])
+    except (OSError, ValueError, KeyError, StopIteration):
+        pass
+    
+    loaded = Settings()
+    try:
+        # Snapshot contains secrets, so keep it private to the current user
+        fd = os.open(cache_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"key": cache_key, "settings": loaded.model_dump(mode="json")}, f)
+    except OSError:
+        pass
+    return loaded
+
+
 # Global settings instance
-settings = Settings()
+settings = load_settings()
@@ -1,13 +1,25 @@
 import logging
+import re
 from typing import Dict, Any
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from src.tools.python_executor import PythonExecutor
+from src.agents.llm_cache import get_llm
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Leading ``` / ```python fence or trailing ``` fence around generated code
+CODE_FENCE_RE = re.compile(r"\A\s*```(?:python)?|```\s*\Z")
+
+ANALYTICS_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a Python data analyst. Generate Python code to answer the user's question. "
+               "Use pandas, numpy, or other standard libraries as needed. "
+               "The code should print the results. "
+               "Return ONLY the Python code, no explanations."),
+    ("user", "Question: {question}\nContext: {context}\n\nGenerate Python code:")
+])
+
 class AnalyticsAgent:
     """
     Agent that generates and executes Python code for data analysis.
@@ -15,20 +27,8 @@ class AnalyticsAgent:
     
     def __init__(self):
         self.executor = PythonExecutor()
-        self.llm = ChatOpenAI(
-            model=settings.llm.openai_model,
-            temperature=0.0,
-            api_key=settings.llm.openai_api_key
-        )
-        
-        self.prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a Python data analyst. Generate Python code to answer the user's question. "
-                       "Use pandas, numpy, or other standard libraries as needed. "
-                       "The code should print the results. "
-                       "Return ONLY the Python code, no explanations."),
-            ("user", "Question: {question}\nContext: {context}\n\nGenerate Python code:")
-        ])
-        
+        self.llm = get_llm()
+        self.prompt = ANALYTICS_PROMPT
         self.chain = self.prompt | self.llm | StrOutputParser()
         
     async def analyze(self, question: str, context: str = "") -> Dict[str, Any]:
@@ -79,11 +79,4 @@ class AnalyticsAgent:
     
     def _clean_code(self, code: str) -> str:
         """Remove markdown code fences if present."""
-        code = code.strip()
-        if code.startswith("```python"):
-            code = code[len("```python"):].strip()
-        if code.startswith("```"):
-            code = code[3:].strip()
-        if code.endswith("```"):
-            code = code[:-3].strip()
-        return code
+        return CODE_FENCE_RE.sub("", code).strip()
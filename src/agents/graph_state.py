@@ -16,6 +16,7 @@ class GraphState(TypedDict):
         relevance: Flag 'yes' or 'no' indicating document relevance
         web_search: Flag 'yes' or 'no' indicating if web search is needed
         iterations: Number of self-correction loops
+        query_embedding: Embedding of the question, reused for conversation memory
     """
     question: str
     generation: str
@@ -23,3 +24,4 @@ class GraphState(TypedDict):
     relevance: str
     web_search: str
     iterations: int
+    query_embedding: List[float]
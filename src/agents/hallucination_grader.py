@@ -6,9 +6,8 @@ Checks if the generated answer is grounded in the documents and addresses the qu
 import logging
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
 
-from config.settings import settings
+from src.agents.llm_cache import get_llm, get_structured_llm
 
 logger = logging.getLogger(__name__)
 
@@ -24,42 +23,43 @@ class GradeAnswer(BaseModel):
         description="Answer addresses the question, 'yes' or 'no'"
     )
 
+# Grader prompts (built once at import)
+HALLUCINATION_SYSTEM = """You are a grader assessing whether an LLM generation is grounded in / supported by a set of retrieved facts. \n 
+        Give a binary score 'yes' or 'no'. 'yes' means that the answer is grounded in / supported by the set of facts."""
+
+HALLUCINATION_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", HALLUCINATION_SYSTEM),
+        ("human", "Set of facts: \n\n {documents} \n\n LLM generation: {generation}"),
+    ]
+)
+
+ANSWER_SYSTEM = """You are a grader assessing whether an answer addresses / resolves a question. \n 
+        Give a binary score 'yes' or 'no'. 'yes' means that the answer resolves the question."""
+
+ANSWER_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", ANSWER_SYSTEM),
+        ("human", "User question: \n\n {question} \n\n LLM generation: {generation}"),
+    ]
+)
+
 class HallucinationGrader:
     """
     Agent responsible for checking hallucinations and answer quality.
     """
     
     def __init__(self):
-        self.llm = ChatOpenAI(
-            model=settings.llm.openai_model, 
-            temperature=0,
-            api_key=settings.llm.openai_api_key
-        )
+        self.llm = get_llm()
         
         # Hallucination Checker
-        self.hallucination_llm = self.llm.with_structured_output(GradeHallucinations)
-        hallucination_system = """You are a grader assessing whether an LLM generation is grounded in / supported by a set of retrieved facts. \n 
-        Give a binary score 'yes' or 'no'. 'yes' means that the answer is grounded in / supported by the set of facts."""
-        
-        self.hallucination_prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", hallucination_system),
-                ("human", "Set of facts: \n\n {documents} \n\n LLM generation: {generation}"),
-            ]
-        )
+        self.hallucination_llm = get_structured_llm(GradeHallucinations)
+        self.hallucination_prompt = HALLUCINATION_PROMPT
         self.hallucination_grader = self.hallucination_prompt | self.hallucination_llm
         
         # Answer Checker
-        self.answer_llm = self.llm.with_structured_output(GradeAnswer)
-        answer_system = """You are a grader assessing whether an answer addresses / resolves a question. \n 
-        Give a binary score 'yes' or 'no'. 'yes' means that the answer resolves the question."""
-        
-        self.answer_prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", answer_system),
-                ("human", "User question: \n\n {question} \n\n LLM generation: {generation}"),
-            ]
-        )
+        self.answer_llm = get_structured_llm(GradeAnswer)
+        self.answer_prompt = ANSWER_PROMPT
         self.answer_grader = self.answer_prompt | self.answer_llm
 
     def check_hallucination(self, documents: str, generation: str) -> str:
@@ -79,3 +79,21 @@ class HallucinationGrader:
         except Exception as e:
             logger.error(f"Answer check failed: {e}")
             return "yes"
+
+    async def acheck_hallucination(self, documents: str, generation: str) -> str:
+        """Async variant of check_hallucination."""
+        try:
+            score = await self.hallucination_grader.ainvoke({"documents": documents, "generation": generation})
+            return score.binary_score
+        except Exception as e:
+            logger.error(f"Hallucination check failed: {e}")
+            return "yes"
+
+    async def acheck_answer(self, question: str, generation: str) -> str:
+        """Async variant of check_answer."""
+        try:
+            score = await self.answer_grader.ainvoke({"question": question, "generation": generation})
+            return score.binary_score
+        except Exception as e:
+            logger.error(f"Answer check failed: {e}")
+            return "yes"
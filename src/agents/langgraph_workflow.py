@@ -3,53 +3,112 @@ LangGraph Workflow Definition.
 Orchestrates the multi-agent RAG process.
 """
 
+import asyncio
 import logging
-from typing import Dict, Any
+from functools import cached_property
+from typing import Any, AsyncIterator, Dict, List, Optional
 from langgraph.graph import END, StateGraph
 
 from src.agents.graph_state import GraphState
-from src.agents.router_agent import RouterAgent
-from src.agents.retrieval_grader import RetrievalGrader
-from src.agents.hallucination_grader import HallucinationGrader
+from src.agents.router_agent import RouterAgent, RouteQuery
+from src.agents.retrieval_grader import RetrievalGrader, GradeDocuments
+from src.agents.hallucination_grader import HallucinationGrader, GradeHallucinations, GradeAnswer
 from src.search.hybrid_search import HybridSearchEngine
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_openai import ChatOpenAI
+from src.agents import llm_cache
+from src.agents.llm_cache import get_llm
 
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# RAG Prompt, built once per process
+RAG_PROMPT = ChatPromptTemplate.from_template(
+    """You are an assistant for question-answering tasks. Use the following pieces of retrieved context to answer the question. If you don't know the answer, just say that you don't know. Use three sentences maximum and keep the answer concise.
+            Question: {question} 
+            Context: {context} 
+            Answer:"""
+)
+
+GENERATION_TAG = "rag_generation"
+
+DOCUMENT_SEPARATOR = "\n\n---\n\n"
+
+def format_documents(documents: List[str]) -> str:
+    """Join document contents for prompting, avoiding Python list repr noise."""
+    return DOCUMENT_SEPARATOR.join(documents)
+
 class RAGWorkflow:
     """
     Main RAG workflow using LangGraph.
     """
     
     def __init__(self):
-        self.router = RouterAgent()
-        self.retrieval_grader = RetrievalGrader()
-        self.hallucination_grader = HallucinationGrader()
-        self.search_engine = HybridSearchEngine()
-        
-        # Generator LLM
-        self.llm = ChatOpenAI(
-            model=settings.llm.openai_model, 
-            temperature=0,
-            api_key=settings.llm.openai_api_key
-        )
-        
-        # RAG Prompt
-        prompt = ChatPromptTemplate.from_template(
-            """You are an assistant for question-answering tasks. Use the following pieces of retrieved context to answer the question. If you don't know the answer, just say that you don't know. Use three sentences maximum and keep the answer concise.
-            Question: {question} 
-            Context: {context} 
-            Answer:"""
-        )
-        self.rag_chain = prompt | self.llm | StrOutputParser()
-        
+        # Agents and search clients are built lazily on first use
         self.workflow = self._build_graph()
         self.app = self.workflow.compile()
 
+    def warm_up(self) -> None:
+        """Pre-build the shared LLM and all grader schema bindings at startup."""
+        llm_cache.warm_up(RouteQuery, GradeDocuments, GradeHallucinations, GradeAnswer)
+
+    @cached_property
+    def router(self) -> RouterAgent:
+        return RouterAgent()
+
+    @cached_property
+    def retrieval_grader(self) -> RetrievalGrader:
+        return RetrievalGrader()
+
+    @cached_property
+    def hallucination_grader(self) -> HallucinationGrader:
+        return HallucinationGrader()
+
+    @cached_property
+    def search_engine(self) -> HybridSearchEngine:
+        return HybridSearchEngine()
+
+    @cached_property
+    def llm(self):
+        """Generator LLM."""
+        return get_llm()
+
+    @cached_property
+    def rag_chain(self):
+        # Tagged so astream_answer can pick generation tokens out of the event stream
+        return (RAG_PROMPT | self.llm | StrOutputParser()).with_config(
+            run_name=GENERATION_TAG, tags=[GENERATION_TAG]
+        )
+
+    async def astream_answer(self, question: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run the workflow and stream the answer as it is generated.
+        
+        Yields {"type": "generation_start"} each time the generate node (re)starts,
+        {"type": "token", "content": ...} for each generated token, and finally
+        {"type": "final", "generation": ..., "documents": [...]} with the end state.
+        """
+        async for event in self.app.astream_events(
+            {"question": question, "iterations": 0}, version="v2"
+        ):
+            kind = event["event"]
+            if GENERATION_TAG in event.get("tags", []):
+                if kind == "on_chain_start" and event["name"] == GENERATION_TAG:
+                    yield {"type": "generation_start"}
+                elif kind == "on_chat_model_stream":
+                    content = event["data"]["chunk"].content
+                    if content:
+                        yield {"type": "token", "content": content}
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                # Root graph run finished
+                output = event["data"].get("output") or {}
+                yield {
+                    "type": "final",
+                    "generation": output.get("generation", ""),
+                    "documents": output.get("documents", []),
+                }
+
     def _build_graph(self) -> StateGraph:
         """Build the LangGraph state machine."""
         workflow = StateGraph(GraphState)
@@ -101,8 +160,9 @@ class RAGWorkflow:
         """Retrieve documents."""
         logger.info("---RETRIEVE---")
         question = state["question"]
-        documents = await self.search_engine.search(question)
-        return {"documents": [doc["content"] for doc in documents], "question": question}
+        query_embedding = await self.search_engine.embed_query(question)
+        documents = await self.search_engine.search(question, query_vector=query_embedding)
+        return {"documents": [doc["content"] for doc in documents], "query_embedding": query_embedding}
 
     async def generate(self, state):
         """Generate answer."""
@@ -110,42 +170,46 @@ class RAGWorkflow:
         question = state["question"]
         documents = state["documents"]
         
-        generation = self.rag_chain.invoke({"context": documents, "question": question})
-        return {"documents": documents, "question": question, "generation": generation}
+        # Stream so token events reach astream_answer consumers as they arrive
+        chunks = []
+        async for chunk in self.rag_chain.astream({"context": format_documents(documents), "question": question}):
+            chunks.append(chunk)
+        generation = "".join(chunks)
+        return {"generation": generation, "iterations": state.get("iterations", 0) + 1}
 
-    def grade_documents(self, state):
+    async def grade_documents(self, state):
         """Filter relevant documents."""
         logger.info("---CHECK DOCUMENT RELEVANCE---")
         question = state["question"]
         documents = state["documents"]
         
-        filtered_docs = []
         web_search = "no"
         
-        for d in documents:
-            score = self.retrieval_grader.grade(question, d)
-            if score == "yes":
-                filtered_docs.append(d)
-            else:
-                continue
+        # Grade all documents concurrently, bounded to respect provider rate limits
+        semaphore = asyncio.Semaphore(settings.langgraph.max_concurrent_graders)
+        
+        async def grade(document: str) -> str:
+            async with semaphore:
+                return await self.retrieval_grader.agrade(question, document)
+        
+        scores = await asyncio.gather(*[grade(d) for d in documents])
+        filtered_docs = [d for d, score in zip(documents, scores) if score == "yes"]
                 
         if not filtered_docs:
             web_search = "yes"
             
-        return {"documents": filtered_docs, "question": question, "web_search": web_search}
+        return {"documents": filtered_docs, "web_search": web_search}
 
     def transform_query(self, state):
         """Transform query for better retrieval."""
         logger.info("---TRANSFORM QUERY---")
-        question = state["question"]
-        # Simple re-writing logic (can be enhanced with LLM)
-        return {"question": question, "documents": state["documents"]}
+        # Simple re-writing logic (can be enhanced with LLM); question is unchanged
+        return {"iterations": state.get("iterations", 0) + 1}
 
     def web_search_node(self, state):
         """Web search fallback (placeholder)."""
         logger.info("---WEB SEARCH---")
-        question = state["question"]
-        return {"documents": ["Web search result placeholder"], "question": question}
+        return {"documents": ["Web search result placeholder"]}
 
     # Conditional Edge Functions
     def route_question(self, state):
@@ -163,22 +227,32 @@ class RAGWorkflow:
         web_search = state["web_search"]
         
         if web_search == "yes":
+            if self._iterations_exhausted(state):
+                logger.info("---DECISION: MAX ITERATIONS REACHED, GENERATING---")
+                return "generate"
             return "transform_query"
         return "generate"
 
-    def grade_generation_v_documents_and_question(self, state):
+    async def grade_generation_v_documents_and_question(self, state):
         """Grade generation for hallucinations and relevance."""
         logger.info("---CHECK HALLUCINATIONS---")
         question = state["question"]
         documents = state["documents"]
         generation = state["generation"]
         
-        score = self.hallucination_grader.check_hallucination(str(documents), generation)
+        if self._iterations_exhausted(state):
+            logger.info("---DECISION: MAX ITERATIONS REACHED---")
+            return "useful"
+        
+        # Both checks are independent, so issue them concurrently
+        score, answer_score = await asyncio.gather(
+            self.hallucination_grader.acheck_hallucination(format_documents(documents), generation),
+            self.hallucination_grader.acheck_answer(question, generation),
+        )
         
         if score == "yes":
             logger.info("---DECISION: GENERATION IS GROUNDED---")
-            score = self.hallucination_grader.check_answer(question, generation)
-            if score == "yes":
+            if answer_score == "yes":
                 logger.info("---DECISION: GENERATION ADDRESSES QUESTION---")
                 return "useful"
             else:
@@ -187,3 +261,19 @@ class RAGWorkflow:
         else:
             logger.info("---DECISION: GENERATION IS NOT GROUNDED---")
             return "not supported"
+
+    def _iterations_exhausted(self, state) -> bool:
+        """Whether the self-correction loop has hit its configured cap."""
+        return state.get("iterations", 0) >= settings.langgraph.max_iterations
+
+
+# Process-wide workflow; graph compilation happens once per process
+_workflow_singleton: Optional[RAGWorkflow] = None
+
+
+def get_workflow() -> RAGWorkflow:
+    """Return the shared RAGWorkflow, compiling the graph on first use."""
+    global _workflow_singleton
+    if _workflow_singleton is None:
+        _workflow_singleton = RAGWorkflow()
+    return _workflow_singleton
@@ -0,0 +1,75 @@
+"""
+Shared LLM client cache.
+Agents reuse a single ChatOpenAI per (model, temperature) so they share one
+HTTP connection pool and tokenizer instead of building their own.
+"""
+
+from functools import lru_cache
+from typing import Type
+
+import httpx
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
+
+from config.settings import settings
+
+# Resolved once at import; agents no longer read these from settings per instance
+OPENAI_MODEL = settings.llm.openai_model
+OPENAI_API_KEY = settings.llm.openai_api_key
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide HTTP client for OpenAI-compatible APIs.
+    
+    Passing it to every AsyncOpenAI / ChatOpenAI lets them reuse keep-alive
+    connections and TLS sessions instead of each opening its own pool. HTTP/2
+    is negotiated over TLS, so concurrent requests to api.openai.com multiplex
+    over one connection; plain-http local servers stay on HTTP/1.1.
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        # The OpenAI SDK's own defaults; per-client timeouts still override them
+        timeout=httpx.Timeout(600.0, connect=5.0),
+        limits=httpx.Limits(max_keepalive_connections=64, max_connections=128)
+    )
+
+
+async def close_http_client() -> None:
+    """
+    Close the shared HTTP client and drop the models built on it.
+    
+    The client's connections belong to the event loop that first used it, so
+    call this on shutdown or before the loop ends (e.g. at the end of an
+    asyncio.run script); the next caller gets a fresh client.
+    """
+    if get_http_client.cache_info().currsize:
+        await get_http_client().aclose()
+        get_http_client.cache_clear()
+    get_llm.cache_clear()
+    get_structured_llm.cache_clear()
+
+
+@lru_cache(maxsize=8)
+def get_llm(model: str = OPENAI_MODEL, temperature: float = 0.0) -> ChatOpenAI:
+    """Return the shared chat model for the given model and temperature."""
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        api_key=OPENAI_API_KEY,
+        http_async_client=get_http_client()
+    )
+
+
+@lru_cache(maxsize=16)
+def get_structured_llm(schema: Type[BaseModel], model: str = OPENAI_MODEL, temperature: float = 0.0):
+    """Return the shared chat model bound to a structured output schema."""
+    return get_llm(model, temperature).with_structured_output(schema)
+
+
+def warm_up(*schemas: Type[BaseModel]) -> None:
+    """Build the shared client and structured-output bindings ahead of the first request."""
+    get_llm()
+    for schema in schemas:
+        get_structured_llm(schema)
@@ -4,54 +4,92 @@ Evaluates the relevance of retrieved documents to the user's question.
 """
 
 import logging
+from collections import OrderedDict
+from typing import Optional, Tuple
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
 
-from config.settings import settings
+from src.agents.llm_cache import get_llm, get_structured_llm
 
 logger = logging.getLogger(__name__)
 
+GRADE_CACHE_SIZE = 4096
+
 class GradeDocuments(BaseModel):
     """Binary score for relevance check on retrieved documents."""
     binary_score: str = Field(
         description="Documents are relevant to the question, 'yes' or 'no'"
     )
 
+GRADE_SYSTEM = """You are a grader assessing relevance of a retrieved document to a user question. \n 
+        If the document contains keyword(s) or semantic meaning related to the user question, grade it as relevant. \n
+        It does not need to be a stringent test. The goal is to filter out erroneous retrievals. \n
+        Give a binary score 'yes' or 'no' score to indicate whether the document is relevant to the question."""
+
+GRADE_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", GRADE_SYSTEM),
+        ("human", "Retrieved document: \n\n {document} \n\n User question: {question}"),
+    ]
+)
+
 class RetrievalGrader:
     """
     Agent responsible for grading retrieved documents.
     """
     
     def __init__(self):
-        self.llm = ChatOpenAI(
-            model=settings.llm.openai_model, 
-            temperature=0,
-            api_key=settings.llm.openai_api_key
-        )
-        self.structured_llm = self.llm.with_structured_output(GradeDocuments)
-        
-        system = """You are a grader assessing relevance of a retrieved document to a user question. \n 
-        If the document contains keyword(s) or semantic meaning related to the user question, grade it as relevant. \n
-        It does not need to be a stringent test. The goal is to filter out erroneous retrievals. \n
-        Give a binary score 'yes' or 'no' score to indicate whether the document is relevant to the question."""
-        
-        self.prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", system),
-                ("human", "Retrieved document: \n\n {document} \n\n User question: {question}"),
-            ]
-        )
-        
+        self.llm = get_llm()
+        self.structured_llm = get_structured_llm(GradeDocuments)
+        self.prompt = GRADE_PROMPT
         self.grader = self.prompt | self.structured_llm
+        
+        # LRU of grades keyed by (hash(question), hash(document)) so large
+        # documents are not retained by the cache
+        self._cache: "OrderedDict[Tuple[int, int], str]" = OrderedDict()
 
     def grade(self, question: str, document: str) -> str:
         """
         Grade the relevance of a document.
         """
+        key = (hash(question), hash(document))
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
         try:
             score = self.grader.invoke({"question": question, "document": document})
-            return score.binary_score
+            return self._cache_put(key, score.binary_score)
         except Exception as e:
             logger.error(f"Grading failed: {e}")
             return "yes" # Default to keeping document
+
+    async def agrade(self, question: str, document: str) -> str:
+        """
+        Async variant of grade.
+        """
+        key = (hash(question), hash(document))
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        try:
+            score = await self.grader.ainvoke({"question": question, "document": document})
+            return self._cache_put(key, score.binary_score)
+        except Exception as e:
+            logger.error(f"Grading failed: {e}")
+            return "yes" # Default to keeping document
+
+    def clear_cache(self) -> None:
+        """Drop memoized grades (e.g. after a config reload)."""
+        self._cache.clear()
+
+    def _cache_get(self, key: Tuple[int, int]) -> Optional[str]:
+        score = self._cache.get(key)
+        if score is not None:
+            self._cache.move_to_end(key)
+        return score
+
+    def _cache_put(self, key: Tuple[int, int], score: str) -> str:
+        self._cache[key] = score
+        if len(self._cache) > GRADE_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return score
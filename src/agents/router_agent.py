@@ -4,15 +4,17 @@ Classifies user queries to determine the appropriate retrieval strategy.
 """
 
 import logging
+from collections import OrderedDict
 from typing import Literal
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
 
-from config.settings import settings
+from src.agents.llm_cache import get_llm, get_structured_llm
 
 logger = logging.getLogger(__name__)
 
+ROUTE_CACHE_SIZE = 4096
+
 class RouteQuery(BaseModel):
     """Route a user query to the most relevant datasource."""
     datasource: Literal["vectorstore", "web_search", "sql_db"] = Field(
@@ -20,44 +22,59 @@ class RouteQuery(BaseModel):
         description="Given a user question choose to route it to web_search, vectorstore, or sql_db.",
     )
 
+ROUTER_SYSTEM = """You are an expert at routing a user question to a vectorstore, web search, or SQL database.
+        The vectorstore contains technical reports, engineering specifications, and product manuals.
+        Use the vectorstore for questions about specific technical details, parameters, or document content.
+        Use web_search for questions about current events, general knowledge, or recent news.
+        Use sql_db for questions requiring structured data analysis, counting, or aggregation of metadata.
+        """
+
+ROUTER_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", ROUTER_SYSTEM),
+        ("human", "{question}"),
+    ]
+)
+
 class RouterAgent:
     """
     Agent responsible for routing queries.
     """
     
     def __init__(self):
-        self.llm = ChatOpenAI(
-            model=settings.llm.openai_model, 
-            temperature=0,
-            api_key=settings.llm.openai_api_key
-        )
-        self.structured_llm = self.llm.with_structured_output(RouteQuery)
-        
-        system = """You are an expert at routing a user question to a vectorstore, web search, or SQL database.
-        The vectorstore contains technical reports, engineering specifications, and product manuals.
-        Use the vectorstore for questions about specific technical details, parameters, or document content.
-        Use web_search for questions about current events, general knowledge, or recent news.
-        Use sql_db for questions requiring structured data analysis, counting, or aggregation of metadata.
-        """
-        
-        self.prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", system),
-                ("human", "{question}"),
-            ]
-        )
-        
+        self.llm = get_llm()
+        self.structured_llm = get_structured_llm(RouteQuery)
+        self.prompt = ROUTER_PROMPT
         self.router = self.prompt | self.structured_llm
+        
+        # LRU of routing decisions keyed by the normalized question; the router
+        # itself always sees the original text, so acronyms keep their case
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
 
     def route(self, question: str) -> str:
         """
         Route the question to the appropriate datasource.
         """
         logger.info(f"Routing question: {question}")
+        key = question.strip().lower()
+        datasource = self._cache.get(key)
+        if datasource is not None:
+            self._cache.move_to_end(key)
+            logger.info(f"Routed to: {datasource}")
+            return datasource
         try:
-            result = self.router.invoke({"question": question})
-            logger.info(f"Routed to: {result.datasource}")
-            return result.datasource
+            datasource = self.router.invoke({"question": question}).datasource
         except Exception as e:
+            # Failed routings are not memoized
             logger.error(f"Routing failed: {e}")
             return "vectorstore" # Default fallback
+        
+        self._cache[key] = datasource
+        if len(self._cache) > ROUTE_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        logger.info(f"Routed to: {datasource}")
+        return datasource
+
+    def clear_cache(self) -> None:
+        """Drop memoized routing decisions (e.g. after a config reload)."""
+        self._cache.clear()
@@ -3,22 +3,32 @@ Main FastAPI application.
 Exposes endpoints for search, ingestion, and feedback.
 """
 
+import asyncio
+import json
 import logging
 import uuid
 import time
 from typing import List
 from contextlib import asynccontextmanager
 
+import aiofiles
 from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 
-from src.api.models import SearchRequest, SearchResponse, FeedbackRequest, IngestResponse
+from src.api.models import SearchRequest, SearchResponse, FeedbackRequest, IngestResponse, PreloadRequest, PreloadResponse
 from src.api.auth import AuthHandler
-from src.agents.langgraph_workflow import RAGWorkflow
+from src.cache.inflight import InflightDedupe
+from src.cache.middleware import ResponseCacheMiddleware
+from src.cache.query_frequency import QueryFrequency
+from src.cache.redis_client import RedisClient
+from src.agents.langgraph_workflow import get_workflow
+from src.agents.llm_cache import close_http_client
 from src.ingestion.pipeline import IngestionPipeline
 from src.database.cloudsql_client import CloudSQLClient
 from src.database.snowflake_client import SnowflakeClient
+from src.graph.neo4j_client import close_driver
 from src.observability.otel_instrumentation import setup_telemetry
 from src.observability.metrics import QUERY_COUNTER, QUERY_LATENCY, FEEDBACK_SCORE
 
@@ -39,6 +49,9 @@ sql_client = None
 snowflake_client = None
 auth_handler = AuthHandler()
 
+# Uploads are streamed to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1 << 20
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle manager for startup and shutdown."""
@@ -48,10 +61,13 @@ async def lifespan(app: FastAPI):
     logger.info("Starting RAG Service...")
     setup_telemetry()
     
-    rag_workflow = RAGWorkflow()
+    rag_workflow = get_workflow()
+    rag_workflow.warm_up()
     ingestion_pipeline = IngestionPipeline()
     sql_client = CloudSQLClient()
+    await sql_client.connect()
     snowflake_client = SnowflakeClient()
+    await snowflake_client.start()
     
     # Initialize voice services if enabled
     if settings.voice.enable_voice_interface:
@@ -64,19 +80,41 @@ async def lifespan(app: FastAPI):
             elevenlabs_api_key=settings.voice.elevenlabs_api_key
         )
     
+    # Warm caches in the background so startup is not delayed
+    background_tasks = []
+    if settings.redis.warmup_queries > 0:
+        background_tasks.append(asyncio.create_task(warm_cache()))
+    if settings.redis.hot_query_refresh_interval > 0:
+        background_tasks.append(asyncio.create_task(refresh_hot_queries()))
+    
     yield
     
+    for task in background_tasks:
+        task.cancel()
+    
     # Shutdown
     logger.info("Shutting down RAG Service...")
-    # Close connections if needed
+    await sql_client.close()
+    await snowflake_client.close()
+    await close_driver()
+    await close_http_client()
 
 app = FastAPI(
     title="Scalable Context-Aware Search API",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Middleware
+# Added first so CORS wraps it and also applies to cached responses
+app.add_middleware(
+    ResponseCacheMiddleware,
+    auth_handler=auth_handler,
+    paths=["/search"],
+    ttl=settings.redis.ttl,
+    prefix="search"
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.api.cors_origins,
@@ -104,10 +142,86 @@ async def health_check():
         "privacy_mode": settings.privacy.privacy_mode
     }
 
-from src.cache.decorators import cache_response
+# Coalesces concurrent identical queries onto one workflow run
+search_dedupe = InflightDedupe()
+redis_client = RedisClient()
+query_frequency = QueryFrequency()
+
+def workflow_cache_key(query: str) -> str:
+    return f"workflow:{InflightDedupe.make_key(query)}"
+
+async def answer_query(query: str, refresh: bool = False) -> dict:
+    """
+    Run the RAG workflow for a query, sharing in-flight runs and caching the result.
+    
+    Results are keyed on the normalized query, independent of the user, so
+    preloaded answers serve everyone. Frequently asked queries are cached longer.
+    With refresh=True the cached result is recomputed.
+    """
+    cache_key = workflow_cache_key(query)
+    
+    async def run() -> dict:
+        if not refresh:
+            cached = await redis_client.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        result = await rag_workflow.app.ainvoke({
+            "question": query,
+            "iterations": 0
+        })
+        await redis_client.set(cache_key, {
+            "generation": result.get("generation", ""),
+            "documents": result.get("documents", []),
+            "query_embedding": result.get("query_embedding", [])
+        }, ttl=query_frequency.ttl_for(frequency))
+        return result
+    
+    # Refreshes are not user demand, so they read the frequency without counting
+    frequency = await query_frequency.record(query, increment=0 if refresh else 1)
+    return await search_dedupe.run(query, run)
+
+async def preload_queries(queries: List[str], refresh: bool = False) -> int:
+    """Pre-execute queries with bounded concurrency; returns how many succeeded."""
+    semaphore = asyncio.Semaphore(settings.redis.warmup_concurrency)
+    
+    async def warm(query: str) -> bool:
+        async with semaphore:
+            try:
+                await answer_query(query, refresh=refresh)
+                return True
+            except Exception as e:
+                logger.warning(f"Cache preload failed for '{query}': {e}")
+                return False
+    
+    results = await asyncio.gather(*[warm(q) for q in dict.fromkeys(queries)])
+    return sum(results)
+
+async def warm_cache():
+    """Pre-execute the most frequent recent queries so early traffic hits warm caches."""
+    try:
+        queries = await sql_client.get_recent_queries(limit=settings.redis.warmup_queries)
+        warmed = await preload_queries(queries)
+        logger.info(f"Cache warmup complete: {warmed}/{len(queries)} queries")
+    except Exception as e:
+        logger.error(f"Cache warmup failed: {e}")
+
+async def refresh_hot_queries():
+    """Periodically recompute hot queries whose cached answers expire before the next pass."""
+    interval = settings.redis.hot_query_refresh_interval
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            hot = await query_frequency.top_queries(settings.redis.hot_query_count)
+            ttls = await redis_client.ttls([workflow_cache_key(q) for q in hot])
+            expiring = [q for q, ttl in zip(hot, ttls) if ttl < 2 * interval]
+            if expiring:
+                refreshed = await preload_queries(expiring, refresh=True)
+                logger.info(f"Refreshed {refreshed}/{len(expiring)} hot queries")
+        except Exception as e:
+            logger.error(f"Hot query refresh failed: {e}")
 
 @app.post("/search", response_model=SearchResponse)
-@cache_response(ttl=settings.redis.ttl, prefix="search")
 async def search(
     request: SearchRequest,
     background_tasks: BackgroundTasks,
@@ -121,11 +235,8 @@ async def search(
     query_id = str(uuid.uuid4())
     
     try:
-        # Execute RAG Workflow
-        result = await rag_workflow.app.ainvoke({
-            "question": request.query,
-            "iterations": 0
-        })
+        # Execute RAG Workflow (cached, and shared with identical queries already in flight)
+        result = await answer_query(request.query)
         
         generation = result.get("generation", "No answer generated.")
         documents = result.get("documents", [])
@@ -140,7 +251,7 @@ async def search(
             user_id=user_id,
             query=request.query,
             response=generation,
-            embedding=[] # TODO: Get embedding from workflow
+            embedding=result.get("query_embedding", [])
         )
         
         return SearchResponse(
@@ -155,6 +266,45 @@ async def search(
         logger.error(f"Search failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/search/stream")
+async def search_stream(
+    request: SearchRequest,
+    user_id: str = Depends(auth_handler.get_current_user)
+):
+    """
+    Stream the generated answer as Server-Sent Events.
+    
+    Emits token events as soon as the generator produces them, followed by a
+    final event carrying the full answer and documents.
+    """
+    QUERY_COUNTER.add(1)
+    query_id = str(uuid.uuid4())
+    
+    async def event_stream():
+        start_time = time.time()
+        try:
+            async for event in rag_workflow.astream_answer(request.query):
+                if event["type"] == "final":
+                    event["query_id"] = query_id
+                    QUERY_LATENCY.record(time.time() - start_time)
+                yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            logger.error(f"Streaming search failed: {e}")
+            yield f"data: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@app.post("/cache/preload", response_model=PreloadResponse)
+async def preload_cache(
+    request: PreloadRequest,
+    user_id: str = Depends(auth_handler.get_current_user)
+):
+    """
+    Pre-execute hot queries so later requests for them are served from cache.
+    """
+    warmed = await preload_queries(request.queries)
+    return PreloadResponse(requested=len(request.queries), warmed=warmed)
+
 @app.post("/ingest", response_model=IngestResponse)
 async def ingest_document(
     file: UploadFile = File(...),
@@ -169,9 +319,9 @@ async def ingest_document(
     try:
         # Save temp file
         temp_path = f"{settings.storage.temp_upload_path}/{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        async with aiofiles.open(temp_path, "wb") as buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await buffer.write(chunk)
             
         # Process document
         result = await ingestion_pipeline.process_document(temp_path)
@@ -198,7 +348,8 @@ async def submit_feedback(
     try:
         FEEDBACK_SCORE.observe(request.score)
         
-        snowflake_client.log_feedback({
+        # Inserted in batches by the client's background flusher
+        snowflake_client.queue_feedback({
             "query_id": request.query_id,
             "user_id": user_id,
             "feedback_score": request.score,
@@ -214,3 +365,20 @@ async def submit_feedback(
     except Exception as e:
         logger.error(f"Feedback submission failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    # uvloop and httptools ship with uvicorn[standard]; workers need the import string
+    uvicorn.run(
+        "src.api.main:app",
+        host=settings.api.api_host,
+        port=settings.api.api_port,
+        workers=settings.api.api_workers,
+        loop="uvloop",
+        http="httptools",
+        ws_max_size=settings.api.ws_max_size,
+        ws_ping_interval=settings.api.ws_ping_interval,
+        log_level=settings.observability.log_level.lower()
+    )
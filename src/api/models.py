@@ -26,6 +26,15 @@ class FeedbackRequest(BaseModel):
     score: int = Field(..., ge=1, le=5, description="Rating 1-5")
     comment: Optional[str] = Field(None, description="Optional text feedback")
 
+class PreloadRequest(BaseModel):
+    """Request model for cache preloading."""
+    queries: List[str] = Field(..., min_length=1, max_length=500, description="Queries to pre-execute")
+
+class PreloadResponse(BaseModel):
+    """Response model for cache preloading."""
+    requested: int
+    warmed: int
+
 class IngestResponse(BaseModel):
     """Response model for ingestion."""
     filename: str
@@ -3,27 +3,31 @@ WebSocket server for real-time voice communication.
 Handles bidirectional streaming of audio data and transcriptions.
 """
 
+import asyncio
+import base64
 import logging
+import re
 import time
 import uuid
 import json
-from typing import Dict, Optional
+from typing import Dict, Optional, Set
+import msgpack
+import orjson
+from cachetools import TTLCache
 from fastapi import WebSocket, WebSocketDisconnect, Depends
 from fastapi.routing import APIRouter
 
 from src.voice.speech_to_text import SpeechToTextService
 from src.voice.text_to_speech import TextToSpeechService
 from src.voice.voice_models import (
-    VoiceMessage,
     MessageType,
     AudioChunk,
     VoiceSessionState,
     VoiceConfig,
-    VoiceProvider,
-    SynthesisRequest
+    VoiceProvider
 )
 from src.api.auth import AuthHandler
-from src.agents.langgraph_workflow import RAGWorkflow
+from src.agents.langgraph_workflow import RAGWorkflow, get_workflow
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -31,8 +35,14 @@ logger = logging.getLogger(__name__)
 # Router for WebSocket endpoints
 router = APIRouter()
 
-# Active sessions
-active_sessions: Dict[str, VoiceSessionState] = {}
+# Active sessions; bounded so sessions whose cleanup never ran cannot accumulate
+active_sessions: Dict[str, VoiceSessionState] = TTLCache(
+    maxsize=settings.voice.max_sessions,
+    ttl=settings.voice.session_ttl
+)
+
+# Generated text is handed to TTS one sentence at a time
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
 
 
 class VoiceWebSocketManager:
@@ -45,6 +55,10 @@ class VoiceWebSocketManager:
         self.tts_service: Optional[TextToSpeechService] = None
         self.rag_workflow: Optional[RAGWorkflow] = None
         self.auth_handler = AuthHandler()
+        # Sessions whose client speaks msgpack binary frames (raw audio bytes, no base64)
+        self.binary_sessions: Set[str] = set()
+        # Per-session outbound frames, drained to the socket by a writer task
+        self.send_queues: Dict[str, asyncio.Queue] = {}
     
     def initialize(
         self,
@@ -58,7 +72,7 @@ class VoiceWebSocketManager:
             provider=tts_provider,
             elevenlabs_api_key=elevenlabs_api_key
         )
-        self.rag_workflow = RAGWorkflow()
+        self.rag_workflow = get_workflow()
         logger.info("Voice WebSocket manager initialized")
     
     async def handle_connection(
@@ -86,6 +100,11 @@ class VoiceWebSocketManager:
         )
         active_sessions[session_id] = session_state
         
+        # Bounded so a slow peer back-pressures producers instead of buffering unboundedly
+        send_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.voice.send_queue_size)
+        self.send_queues[session_id] = send_queue
+        writer = asyncio.create_task(self._writer(websocket, send_queue))
+        
         logger.info(f"WebSocket connection established: session={session_id}, user={user_id}")
         
         # Send welcome message
@@ -98,9 +117,16 @@ class VoiceWebSocketManager:
         
         try:
             while True:
-                # Receive message from client
-                data = await websocket.receive_text()
-                message = json.loads(data)
+                # Receive message from client; idle clients (e.g. half-open connections) are closed
+                try:
+                    message = await asyncio.wait_for(
+                        self._receive_message(websocket, session_id),
+                        timeout=settings.voice.session_idle_timeout
+                    )
+                except asyncio.TimeoutError:
+                    logger.info(f"Closing idle WebSocket: session={session_id}")
+                    await websocket.close(code=1001)
+                    break
                 
                 # Update last activity
                 session_state.last_activity = time.time()
@@ -114,11 +140,34 @@ class VoiceWebSocketManager:
             logger.error(f"WebSocket error: {e}")
             await self._send_error(websocket, session_id, str(e))
         finally:
-            # Clean up session
-            if session_id in active_sessions:
-                del active_sessions[session_id]
+            # Clean up session, letting the writer flush what is already queued
+            self.send_queues.pop(session_id, None)
+            try:
+                send_queue.put_nowait(None)
+                await asyncio.wait_for(writer, timeout=5)
+            except (asyncio.QueueFull, asyncio.TimeoutError):
+                writer.cancel()
+            active_sessions.pop(session_id, None)
+            self.binary_sessions.discard(session_id)
             logger.info(f"Session cleaned up: {session_id}")
     
+    async def _receive_message(self, websocket: WebSocket, session_id: str) -> dict:
+        """
+        Receive one client message.
+        
+        Binary frames carry msgpack with raw audio bytes; text frames carry JSON
+        with base64 audio. A session switches to binary replies once its client
+        sends a binary frame.
+        """
+        frame = await websocket.receive()
+        if frame["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(frame.get("code", 1000))
+        
+        if frame.get("bytes") is not None:
+            self.binary_sessions.add(session_id)
+            return msgpack.unpackb(frame["bytes"], raw=False)
+        return json.loads(frame["text"])
+    
     async def _handle_message(
         self,
         websocket: WebSocket,
@@ -151,12 +200,13 @@ class VoiceWebSocketManager:
     ):
         """Handle incoming audio chunk"""
         try:
-            # Extract audio data (base64 encoded)
-            import base64
-            audio_data = base64.b64decode(message["data"])
+            # Binary frames carry raw bytes; JSON frames carry base64
+            audio_data = message["data"]
+            if isinstance(audio_data, str):
+                audio_data = base64.b64decode(audio_data)
             
             # Add to buffer
-            session_state.buffer.append(audio_data)
+            session_state.buffer.extend(audio_data)
             session_state.is_recording = True
             
             # Send acknowledgment
@@ -164,7 +214,7 @@ class VoiceWebSocketManager:
                 websocket,
                 MessageType.STATUS,
                 session_state.session_id,
-                {"status": "recording", "buffer_size": len(session_state.buffer)}
+                {"status": "recording", "buffer_bytes": len(session_state.buffer)}
             )
             
         except Exception as e:
@@ -182,12 +232,9 @@ class VoiceWebSocketManager:
             return
         
         try:
-            # Combine audio chunks
-            combined_audio = b"".join(session_state.buffer)
-            
             # Transcribe
             transcription = await self.stt_service.transcribe(
-                audio_data=combined_audio,
+                audio_data=session_state.buffer,
                 language=session_state.config.language,
                 format="webm"
             )
@@ -233,54 +280,109 @@ class VoiceWebSocketManager:
                 {"status": "processing", "message": "Searching knowledge base..."}
             )
             
-            # Execute RAG workflow
-            result = await self.rag_workflow.app.ainvoke({
-                "question": query_text,
-                "iterations": 0
-            })
-            
-            answer = result.get("generation", "No answer generated.")
+            # Speak sentences while the answer is still being generated
+            await self._stream_speech(websocket, session_state, query_text)
             
-            # Send text response
+            # Send completion status
             await self._send_message(
                 websocket,
                 MessageType.STATUS,
                 session_state.session_id,
-                {"status": "generating_speech", "answer": answer}
+                {"status": "complete", "message": "Response generated"}
             )
             
-            # Generate speech
-            synthesis_request = SynthesisRequest(
-                text=answer,
-                voice_id=session_state.config.voice_id
+        except Exception as e:
+            logger.error(f"Query error: {e}")
+            await self._send_error(websocket, session_state.session_id, str(e))
+    
+    async def _stream_speech(
+        self,
+        websocket: WebSocket,
+        session_state: VoiceSessionState,
+        query_text: str
+    ) -> str:
+        """
+        Run the RAG workflow, synthesizing each completed sentence as it streams in.
+        
+        Speech is speculative: a draft is spoken before the graders have seen it.
+        When they reject it and generation restarts, its audio is stopped and a
+        "retracted" status tells the client to discard what it has played.
+        The answer text is sent as soon as the graded answer is final, alongside
+        its remaining audio. Returns the final answer.
+        """
+        answer = ""
+        pending = ""
+        sentences: Optional[asyncio.Queue] = None
+        speaker: Optional[asyncio.Task] = None
+        try:
+            async for event in self.rag_workflow.astream_answer(query_text):
+                if event["type"] == "generation_start":
+                    if speaker is not None:
+                        await self._stop_speaker(speaker)
+                        await self._send_message(
+                            websocket,
+                            MessageType.STATUS,
+                            session_state.session_id,
+                            {"status": "retracted", "message": "Answer rejected by grader, regenerating..."}
+                        )
+                    sentences = asyncio.Queue()
+                    speaker = asyncio.create_task(self._speak_sentences(websocket, session_state, sentences))
+                    pending = ""
+                elif event["type"] == "token" and sentences is not None:
+                    *complete, pending = SENTENCE_END_RE.split(pending + event["content"])
+                    for sentence in complete:
+                        await sentences.put(sentence)
+                elif event["type"] == "final":
+                    answer = event["generation"]
+            
+            await self._send_message(
+                websocket,
+                MessageType.STATUS,
+                session_state.session_id,
+                {"status": "generating_speech", "answer": answer or "No answer generated."}
             )
             
-            # Stream audio response
+            if speaker is not None:
+                if pending.strip():
+                    await sentences.put(pending)
+                await sentences.put(None)
+                await speaker
+        finally:
+            if speaker is not None and not speaker.done():
+                await self._stop_speaker(speaker)
+        
+        return answer
+    
+    @staticmethod
+    async def _stop_speaker(speaker: asyncio.Task):
+        """Cancel a speaker task and wait until it can send no more audio."""
+        speaker.cancel()
+        try:
+            await speaker
+        except asyncio.CancelledError:
+            pass
+    
+    async def _speak_sentences(
+        self,
+        websocket: WebSocket,
+        session_state: VoiceSessionState,
+        sentences: asyncio.Queue
+    ):
+        """Synthesize queued sentences and stream the audio until the sentinel arrives."""
+        while (sentence := await sentences.get()) is not None:
             async for audio_chunk in self.tts_service.synthesize_stream(
-                text=answer,
+                text=sentence,
                 voice_id=session_state.config.voice_id
             ):
-                import base64
-                audio_b64 = base64.b64encode(audio_chunk).decode('utf-8')
+                if session_state.session_id not in self.binary_sessions:
+                    audio_chunk = base64.b64encode(audio_chunk).decode('utf-8')
                 
                 await self._send_message(
                     websocket,
                     MessageType.SYNTHESIS,
                     session_state.session_id,
-                    {"audio_chunk": audio_b64, "format": "mp3"}
+                    {"audio_chunk": audio_chunk, "format": "mp3"}
                 )
-            
-            # Send completion status
-            await self._send_message(
-                websocket,
-                MessageType.STATUS,
-                session_state.session_id,
-                {"status": "complete", "message": "Response generated"}
-            )
-            
-        except Exception as e:
-            logger.error(f"Query error: {e}")
-            await self._send_error(websocket, session_state.session_id, str(e))
     
     async def _handle_config_update(
         self,
@@ -312,13 +414,13 @@ class VoiceWebSocketManager:
         data: dict
     ):
         """Send message to client"""
-        message = VoiceMessage(
-            type=msg_type,
-            session_id=session_id,
-            data=data,
-            timestamp=time.time()
-        )
-        await websocket.send_text(message.json())
+        await self._send(websocket, {
+            "type": msg_type.value,
+            "session_id": session_id,
+            "data": data,
+            "timestamp": time.time(),
+            "error": None
+        })
     
     async def _send_error(
         self,
@@ -327,14 +429,53 @@ class VoiceWebSocketManager:
         error: str
     ):
         """Send error message to client"""
-        message = VoiceMessage(
-            type=MessageType.ERROR,
-            session_id=session_id,
-            data={},
-            timestamp=time.time(),
-            error=error
-        )
-        await websocket.send_text(message.json())
+        await self._send(websocket, {
+            "type": MessageType.ERROR.value,
+            "session_id": session_id,
+            "data": {},
+            "timestamp": time.time(),
+            "error": error
+        })
+    
+    async def _send(self, websocket: WebSocket, message: dict):
+        """
+        Encode a message in the session's framing and queue it for the writer.
+        
+        Messages follow the VoiceMessage schema but are built as plain dicts:
+        they are server-generated, so per-frame model validation would only add
+        cost on the audio path.
+        """
+        session_id = message["session_id"]
+        if session_id in self.binary_sessions:
+            frame = msgpack.packb(message, use_bin_type=True)
+        else:
+            frame = orjson.dumps(message).decode("utf-8")
+        
+        send_queue = self.send_queues.get(session_id)
+        if send_queue is None:
+            await self._send_frame(websocket, frame)
+        else:
+            await send_queue.put(frame)
+    
+    async def _writer(self, websocket: WebSocket, send_queue: asyncio.Queue):
+        """Drain queued frames to the socket until the None sentinel arrives."""
+        failed = False
+        while (frame := await send_queue.get()) is not None:
+            if failed:
+                # Keep draining so producers never block on a dead socket
+                continue
+            try:
+                await self._send_frame(websocket, frame)
+            except Exception as e:
+                logger.warning(f"WebSocket send failed: {e}")
+                failed = True
+    
+    @staticmethod
+    async def _send_frame(websocket: WebSocket, frame):
+        if isinstance(frame, bytes):
+            await websocket.send_bytes(frame)
+        else:
+            await websocket.send_text(frame)
 
 
 # Global manager instance
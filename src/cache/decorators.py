@@ -1,5 +1,4 @@
 import functools
-import json
 from typing import Callable, Any
 from fastapi import Request, Response
 from src.cache.redis_client import RedisClient
@@ -26,24 +25,17 @@ def cache_response(ttl: int = 3600, prefix: str = "api"):
             # Generate cache key
             cache_key = redis_client.generate_key(prefix, **kwargs)
             
-            # Try to get from cache
-            cached_data = await redis_client.get(cache_key)
-            if cached_data:
-                return cached_data
+            # Try to get from cache; hits are already-encoded JSON, so return them
+            # as-is and skip response_model validation and re-serialization
+            cached_bytes = await redis_client.get_raw(cache_key)
+            if cached_bytes:
+                return Response(content=cached_bytes, media_type="application/json")
             
             # Execute function
             result = await func(*args, **kwargs)
             
-            # Cache result (assuming result is serializable)
-            # Note: If result is a Pydantic model, we might need to dump it
-            if hasattr(result, "model_dump"):
-                data_to_cache = result.model_dump()
-            elif hasattr(result, "dict"):
-                data_to_cache = result.dict()
-            else:
-                data_to_cache = result
-                
-            await redis_client.set(cache_key, data_to_cache, ttl=ttl)
+            # RedisClient serializes Pydantic models straight to JSON bytes
+            await redis_client.set(cache_key, result, ttl=ttl)
             
             return result
         return wrapper
@@ -0,0 +1,37 @@
+from typing import List
+import xxhash
+
+from src.cache.redis_client import RedisClient
+from config.settings import settings
+
+
+class EmbeddingCache:
+    """
+    Caches query embeddings in Redis keyed by a hash of the normalized query.
+
+    Repeat queries (and ones differing only in case or surrounding whitespace)
+    reuse the stored vector instead of calling the embedding API again.
+    """
+
+    def __init__(self, embeddings, ttl: int = None):
+        self.embeddings = embeddings
+        self.ttl = ttl or settings.redis.embedding_ttl
+        self.redis_client = RedisClient()
+        # Vectors from different models are not interchangeable
+        self.prefix = f"emb:{getattr(embeddings, 'model', 'default')}"
+
+    def make_key(self, query: str) -> str:
+        """Key on the normalized query text."""
+        return f"{self.prefix}:{xxhash.xxh3_128_hexdigest(query.strip().lower().encode('utf-8'))}"
+
+    async def embed(self, query: str) -> List[float]:
+        """Return the embedding for a query, computing and storing it on a miss."""
+        key = self.make_key(query)
+
+        vector = await self.redis_client.get(key)
+        if vector is not None:
+            return vector
+
+        vector = await self.embeddings.aembed_query(query)
+        await self.redis_client.set(key, vector, ttl=self.ttl)
+        return vector
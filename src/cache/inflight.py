@@ -0,0 +1,44 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+import xxhash
+
+
+class InflightDedupe:
+    """
+    Coalesces concurrent identical requests onto a single in-flight computation.
+    
+    The first caller for a key runs the work; callers arriving while it is still
+    running await the same result instead of repeating it. This covers the window
+    between a cache miss and the cache being populated.
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def make_key(query: str) -> str:
+        """Key on the normalized query text."""
+        return xxhash.xxh3_64_hexdigest(query.strip().lower().encode("utf-8"))
+
+    async def run(self, query: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory() for this query, or join an identical call already in flight."""
+        key = self.make_key(query)
+        
+        task = self._inflight.get(key)
+        if task is None:
+            # The work runs in its own task, so cancelling any caller (the first
+            # included) leaves it running for everyone else who joined
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved in case every caller was cancelled
+
+    def __len__(self) -> int:
+        return len(self._inflight)
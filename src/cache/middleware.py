@@ -0,0 +1,118 @@
+from typing import Iterable
+import xxhash
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.cache.redis_client import RedisClient
+
+redis_client = RedisClient()
+
+
+class ResponseCacheMiddleware:
+    """
+    ASGI middleware caching JSON responses of POST endpoints as raw bytes.
+
+    Hits are answered before routing, so FastAPI's dependency injection,
+    validation and serialization never run for them. Entries are keyed on the
+    authenticated user and the exact request body; requests without a valid
+    bearer token pass straight through to the app.
+    """
+
+    def __init__(self, app: ASGIApp, auth_handler, paths: Iterable[str], ttl: int = 3600, prefix: str = "api"):
+        self.app = app
+        self.auth_handler = auth_handler
+        self.paths = frozenset(paths)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        user_id = self._authenticated_user(scope)
+        if user_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        body = await self._read_body(receive)
+        cache_key = self.make_key(scope["path"], user_id, body)
+
+        cached_bytes = await redis_client.get_raw(cache_key)
+        if cached_bytes:
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(cached_bytes)).encode()),
+                    (b"x-cache", b"HIT"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": cached_bytes})
+            return
+
+        await self.app(scope, self._replay(body, receive), self._capture(cache_key, send))
+
+    def make_key(self, path: str, user_id: str, body: bytes) -> str:
+        digest = xxhash.xxh3_128()
+        for part in (path.encode(), user_id.encode(), body):
+            digest.update(part)
+            digest.update(b"\0")
+        return f"{self.prefix}:{digest.hexdigest()}"
+
+    def _authenticated_user(self, scope: Scope):
+        """Return the token's subject, or None when the request is not authenticated."""
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer" or not token:
+                    return None
+                try:
+                    return self.auth_handler.decode_token(token).get("sub")
+                except Exception:
+                    # Let the endpoint's own auth dependency produce the error response
+                    return None
+        return None
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    @staticmethod
+    def _replay(body: bytes, receive: Receive) -> Receive:
+        """Hand the buffered body to the app, then fall back to the real channel."""
+        sent = False
+
+        async def replay() -> Message:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+        return replay
+
+    def _capture(self, cache_key: str, send: Send) -> Send:
+        """Forward the response while buffering successful bodies into the cache."""
+        status = None
+        chunks = []
+
+        async def capture(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-cache", b"MISS")]
+            await send(message)
+
+            if message["type"] == "http.response.body" and status == 200:
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await redis_client.set(cache_key, b"".join(chunks), ttl=self.ttl)
+        return capture
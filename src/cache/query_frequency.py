@@ -0,0 +1,85 @@
+import logging
+import math
+import time
+from collections import Counter
+from typing import List
+
+from src.cache.redis_client import RedisClient
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = 3600
+
+
+class QueryFrequency:
+    """
+    Tracks how often each normalized query is asked, in hourly Redis sorted sets.
+
+    Frequencies drive adaptive cache TTLs (hot queries live longer) and pick
+    which queries to refresh before their cached answers expire. The estimate
+    covers the current and previous hour, so it does not reset on the hour.
+    """
+
+    def __init__(self, prefix: str = "qfreq"):
+        self.prefix = prefix
+        self.redis_client = RedisClient()
+        self.mock_counts: Counter = Counter()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return query.strip().lower()
+
+    def _window_key(self, hours_ago: int = 0) -> str:
+        return f"{self.prefix}:{int(time.time() // WINDOW_SECONDS) - hours_ago}"
+
+    async def record(self, query: str, increment: int = 1) -> int:
+        """Count `increment` occurrences of the query and return its recent frequency."""
+        member = self.normalize(query)
+        if settings.features.mock_mode:
+            self.mock_counts[member] += increment
+            return self.mock_counts[member]
+
+        if not self.redis_client.client:
+            await self.redis_client.connect()
+
+        current = self._window_key()
+        try:
+            async with self.redis_client.client.pipeline(transaction=False) as pipe:
+                if increment:
+                    pipe.zincrby(current, increment, member)
+                    pipe.expire(current, 2 * WINDOW_SECONDS)
+                else:
+                    pipe.zscore(current, member)
+                pipe.zscore(self._window_key(1), member)
+                results = await pipe.execute()
+            return int((results[0] or 0) + (results[-1] or 0))
+        except Exception as e:
+            logger.warning(f"Query frequency update failed: {e}")
+            return 1
+
+    def ttl_for(self, frequency: int) -> int:
+        """Scale the base TTL by log2 of the frequency, capped at the configured maximum."""
+        ttl = settings.redis.ttl * max(1.0, math.log2(frequency + 1))
+        return min(int(ttl), settings.redis.adaptive_ttl_max)
+
+    async def top_queries(self, k: int) -> List[str]:
+        """Most frequent queries over the current and previous hour, matching record()."""
+        if settings.features.mock_mode:
+            return [q for q, _ in self.mock_counts.most_common(k)]
+
+        if not self.redis_client.client:
+            await self.redis_client.connect()
+
+        # Sum both windows server-side and read only the top k in one MULTI round trip
+        merged = f"{self.prefix}:top"
+        try:
+            async with self.redis_client.client.pipeline(transaction=True) as pipe:
+                pipe.zunionstore(merged, [self._window_key(), self._window_key(1)])
+                pipe.zrevrange(merged, 0, k - 1)
+                pipe.delete(merged)
+                members = (await pipe.execute())[1]
+        except Exception as e:
+            logger.warning(f"Query frequency lookup failed: {e}")
+            return []
+        return [m.decode("utf-8") for m in members]
@@ -1,9 +1,35 @@
-import json
-import hashlib
-from typing import Any, Optional, Union
+from typing import Any, List, Optional, Union
+import msgpack
+import orjson
 import redis.asyncio as redis
+import xxhash
+from cachetools import TTLCache
 from config.settings import settings
 
+
+def _pack_default(obj: Any) -> Any:
+    """msgpack fallback for non-primitive key arguments."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    # Request-scoped helpers (e.g. BackgroundTasks) do not affect the result
+    return type(obj).__name__
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize a cache value to JSON bytes."""
+    if isinstance(value, bytes):
+        return value
+    if hasattr(value, "__pydantic_serializer__"):
+        # pydantic-core writes JSON directly, skipping the model_dump dict
+        return value.__pydantic_serializer__.to_json(value)
+    return orjson.dumps(value, default=_json_default)
+
+
+def _json_default(obj: Any) -> Any:
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
 class RedisClient:
     _instance = None
 
@@ -12,6 +38,11 @@ class RedisClient:
             cls._instance = super(RedisClient, cls).__new__(cls)
             cls._instance.client = None
             cls._instance.mock_cache = {}
+            # L1: in-process cache of encoded values in front of Redis (L2)
+            cls._instance.l1_cache = TTLCache(
+                maxsize=settings.redis.l1_size,
+                ttl=settings.redis.l1_ttl
+            )
         return cls._instance
 
     async def connect(self):
@@ -24,8 +55,7 @@ class RedisClient:
                 host=settings.redis.host,
                 port=settings.redis.port,
                 db=settings.redis.db,
-                password=settings.redis.password,
-                decode_responses=True
+                password=settings.redis.password
             )
 
     async def get(self, key: str) -> Optional[Any]:
@@ -33,15 +63,35 @@ class RedisClient:
         if settings.features.mock_mode:
             return self.mock_cache.get(key)
 
+        data = await self._fetch(key)
+        return orjson.loads(data) if data else None
+
+    async def get_raw(self, key: str) -> Optional[bytes]:
+        """Retrieve the stored JSON bytes without decoding them."""
+        if settings.features.mock_mode:
+            value = self.mock_cache.get(key)
+            return None if value is None else dumps(value)
+
+        return await self._fetch(key)
+
+    async def _fetch(self, key: str) -> Optional[bytes]:
+        """Read encoded bytes from L1, falling back to Redis and populating L1."""
+        data = self.l1_cache.get(key)
+        if data is not None:
+            return data
+
         if not self.client:
             await self.connect()
         
         try:
             data = await self.client.get(key)
-            return json.loads(data) if data else None
         except Exception as e:
             print(f"Redis get error: {e}")
             return None
+        
+        if data is not None:
+            self.l1_cache[key] = data
+        return data
 
     async def set(self, key: str, value: Any, ttl: int = 3600) -> bool:
         """Set value in cache with TTL."""
@@ -52,21 +102,59 @@ class RedisClient:
         if not self.client:
             await self.connect()
 
+        data = dumps(value)
+        # Write-through; entries shorter-lived than L1's TTL stay in Redis only
+        if ttl >= settings.redis.l1_ttl:
+            self.l1_cache[key] = data
+        else:
+            self.l1_cache.pop(key, None)
+
         try:
             return await self.client.set(
                 key, 
-                json.dumps(value), 
+                data, 
                 ex=ttl
             )
         except Exception as e:
             print(f"Redis set error: {e}")
             return False
 
+    async def ttl(self, key: str) -> int:
+        """Remaining TTL in seconds; negative if the key is missing or has no expiry."""
+        if settings.features.mock_mode:
+            return -1 if key in self.mock_cache else -2
+
+        if not self.client:
+            await self.connect()
+
+        try:
+            return await self.client.ttl(key)
+        except Exception as e:
+            print(f"Redis ttl error: {e}")
+            return -2
+
+    async def ttls(self, keys: List[str]) -> List[int]:
+        """ttl() for many keys in one pipelined round trip."""
+        if settings.features.mock_mode:
+            return [-1 if key in self.mock_cache else -2 for key in keys]
+
+        if not self.client:
+            await self.connect()
+
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.ttl(key)
+                return await pipe.execute()
+        except Exception as e:
+            print(f"Redis ttl error: {e}")
+            return [-2] * len(keys)
+
     def generate_key(self, prefix: str, **kwargs) -> str:
         """Generate a unique cache key based on arguments."""
-        sorted_kwargs = dict(sorted(kwargs.items()))
-        key_string = f"{prefix}:{json.dumps(sorted_kwargs, sort_keys=True)}"
-        return hashlib.md5(key_string.encode()).hexdigest()
+        packed = msgpack.packb(sorted(kwargs.items()), use_bin_type=True, default=_pack_default)
+        # Prefix stays outside the hash so keys can be invalidated with SCAN MATCH prefix:*
+        return f"{prefix}:{xxhash.xxh3_128_hexdigest(packed)}"
 
     async def close(self):
         """Close Redis connection."""
@@ -0,0 +1,34 @@
+"""
+Helpers for coalescing queued writes into batches.
+"""
+
+import asyncio
+from typing import Any, List, Tuple
+
+
+async def next_batch(queue: asyncio.Queue, batch_size: int, interval: float) -> Tuple[List[Any], bool]:
+    """
+    Wait for the next item, then keep collecting until the batch is full or
+    `interval` seconds have passed.
+
+    A None item is the shutdown sentinel. Returns (rows, closing); rows may be
+    empty when the sentinel arrives first.
+    """
+    loop = asyncio.get_running_loop()
+
+    row = await queue.get()
+    if row is None:
+        return [], True
+    rows = [row]
+
+    deadline = loop.time() + interval
+    while len(rows) < batch_size:
+        try:
+            row = await asyncio.wait_for(queue.get(), deadline - loop.time())
+        except asyncio.TimeoutError:
+            break
+        if row is None:
+            return rows, True
+        rows.append(row)
+
+    return rows, False
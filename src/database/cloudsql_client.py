@@ -3,12 +3,16 @@ Cloud SQL (PostgreSQL) client with pgvector support.
 Handles user query history and conversation memory.
 """
 
+import asyncio
 import logging
 from typing import List, Dict, Any, Optional
 import psycopg
 from psycopg.rows import dict_row
-from pgvector.psycopg import register_vector
+from psycopg_pool import AsyncConnectionPool
+from pgvector import HalfVector
+from pgvector.psycopg import register_vector_async
 
+from src.database.batching import next_batch
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -22,26 +26,147 @@ class CloudSQLClient:
         self.mock_mode = settings.features.mock_mode
         self.conn_str = settings.postgres.database_url
         self.mock_history = []
+        self.pool: Optional[AsyncConnectionPool] = None
+        # Interactions are queued and written in batches by _writer_loop
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        # Serializes lazy connects so concurrent first callers open the pool once
+        self._connect_lock = asyncio.Lock()
         
         if not self.mock_mode:
-            self._init_db()
+            # Opened in connect(); a pool cannot be opened outside a running event loop
+            self.pool = AsyncConnectionPool(
+                self.conn_str,
+                min_size=min(4, settings.postgres.postgres_pool_size),
+                max_size=settings.postgres.postgres_pool_size,
+                kwargs={"autocommit": True},
+                open=False
+            )
         else:
             logger.info("CloudSQLClient initialized in MOCK MODE")
         
-    def _init_db(self):
-        """Initialize database connection and extensions."""
-        try:
-            with psycopg.connect(self.conn_str, autocommit=True) as conn:
-                conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
-                register_vector(conn)
+    async def connect(self):
+        """Enable pgvector and open the connection pool."""
+        if self.mock_mode or not self.pool.closed:
+            return
+        
+        async with self._connect_lock:
+            # Another caller may have connected while we waited for the lock
+            if not self.pool.closed:
+                return
+            try:
+                async with await psycopg.AsyncConnection.connect(self.conn_str, autocommit=True) as conn:
+                    await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+                    # Look up the vector/halfvec OIDs once; pooled connections copy these adapters
+                    # instead of each querying pg_type on connect
+                    await register_vector_async(conn)
+                    self.pool.kwargs["context"] = conn
+                await self.pool.open()
+                self._write_queue = asyncio.Queue(maxsize=settings.postgres.postgres_write_queue_size)
+                self._start_writer()
                 logger.info("Connected to Cloud SQL and enabled pgvector")
-        except Exception as e:
-            logger.error(f"Failed to connect to Cloud SQL: {e}")
-            raise
+            except Exception as e:
+                logger.error(f"Failed to connect to Cloud SQL: {e}")
+                raise
+
+    async def close(self):
+        """Flush queued interactions and close the connection pool."""
+        if self._writer_task is not None:
+            try:
+                self._ensure_writer()
+                await self._write_queue.put(None)
+                await self._writer_task
+            except Exception as e:
+                # Never let a failed flush keep the pool open
+                logger.error(f"Failed to flush queued interactions: {e}")
+            self._writer_task = None
+        if self.pool is not None and not self.pool.closed:
+            await self.pool.close()
+
+    def _start_writer(self):
+        self._writer_task = asyncio.create_task(self._writer_loop())
+
+    def _ensure_writer(self):
+        """Restart the writer if it exited without being asked to, so the queue keeps draining."""
+        if not self._writer_task.done():
+            return
+        error = None if self._writer_task.cancelled() else self._writer_task.exception()
+        logger.error(f"Cloud SQL writer stopped unexpectedly ({error!r}); restarting")
+        self._start_writer()
+
+    async def _writer_loop(self):
+        """Drain queued interactions into batched COPYs until the None sentinel arrives."""
+        batch_size = settings.postgres.postgres_write_batch_size
+        interval = settings.postgres.postgres_write_interval_ms / 1000
+        closing = False
+        
+        while not closing:
+            rows, closing = await next_batch(self._write_queue, batch_size, interval)
+            if not rows:
+                continue
+            try:
+                try:
+                    await self._copy_interactions(rows)
+                except Exception as e:
+                    # One bad row aborts the whole COPY; retry individually so only it is lost
+                    logger.warning(f"Batched write of {len(rows)} interactions failed, retrying per row: {e}")
+                    await self._insert_interactions(rows)
+            except Exception as e:
+                # e.g. database unreachable: drop this batch but keep draining the queue
+                logger.error(f"Failed to write {len(rows)} interactions to Cloud SQL: {e}")
+
+    async def _insert_interactions(self, rows: List[tuple]):
+        """Insert interactions one at a time, dropping (and logging) only the rows that fail."""
+        failed = 0
+        async with self.pool.connection() as conn:
+            for user_id, query, response, embedding in rows:
+                try:
+                    await conn.execute(
+                        """
+                        INSERT INTO user_query_history (user_id, query_text, response_text, embedding)
+                        VALUES (%s, %s, %s, %s)
+                        """,
+                        (user_id, query, response, HalfVector(embedding) if embedding is not None else None)
+                    )
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Dropped interaction for user {user_id}: {e}")
+        if failed:
+            logger.error(f"Failed to write {failed} of {len(rows)} interactions to Cloud SQL")
 
-    def save_interaction(self, user_id: str, query: str, response: str, embedding: List[float]):
+    @staticmethod
+    def _interaction_row(user_id: str, query: str, response: str, embedding: Optional[List[float]]) -> tuple:
         """
-        Save user interaction with embedding for memory.
+        Build a row for user_query_history.
+        
+        Empty embeddings (e.g. web search route) and ones whose size does not
+        match the halfvec column are stored as NULL rather than failing the write.
+        """
+        if embedding and len(embedding) != settings.llm.embedding_dimension:
+            logger.warning(
+                f"Storing NULL embedding: got {len(embedding)} dimensions, "
+                f"expected {settings.llm.embedding_dimension}"
+            )
+            embedding = None
+        return (user_id, query, response, embedding or None)
+
+    async def _copy_interactions(self, rows: List[tuple]):
+        """Write a batch of interactions with a single binary COPY."""
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                async with cur.copy(
+                    "COPY user_query_history (user_id, query_text, response_text, embedding) FROM STDIN (FORMAT BINARY)"
+                ) as copy:
+                    # Embeddings are stored as halfvec; floats are narrowed to fp16 client-side
+                    copy.set_types(["varchar", "text", "text", "halfvec"])
+                    for row in rows:
+                        await copy.write_row(row)
+
+    async def save_interaction(self, user_id: str, query: str, response: str, embedding: List[float]):
+        """
+        Queue user interaction with embedding for memory.
+        
+        Returns immediately; the row is written by the next batched COPY.
         """
         if self.mock_mode:
             self.mock_history.append({
@@ -54,18 +179,37 @@ class CloudSQLClient:
             logger.info("[MOCK] Saved interaction to CloudSQL mock")
             return
 
-        with psycopg.connect(self.conn_str, autocommit=True) as conn:
-            register_vector(conn)
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    INSERT INTO user_query_history (user_id, query_text, response_text, embedding)
-                    VALUES (%s, %s, %s, %s)
-                    """,
-                    (user_id, query, response, embedding)
-                )
+        await self.connect()
+        self._ensure_writer()
+        try:
+            self._write_queue.put_nowait(self._interaction_row(user_id, query, response, embedding))
+        except asyncio.QueueFull:
+            logger.warning(f"Cloud SQL write queue full; dropping interaction for user {user_id}")
 
-    def get_user_history(self, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+    async def save_interactions(self, rows: List[tuple]):
+        """
+        Bulk-load (user_id, query, response, embedding) rows, e.g. history seeds
+        or evaluation traces.
+        
+        Unlike save_interaction this bypasses the write queue and awaits a single
+        COPY, so failures are raised to the caller.
+        """
+        if self.mock_mode:
+            for user_id, query, response, embedding in rows:
+                self.mock_history.append({
+                    "user_id": user_id,
+                    "query_text": query,
+                    "response_text": response,
+                    "embedding": embedding,
+                    "timestamp": "2024-01-01T00:00:00"
+                })
+            logger.info(f"[MOCK] Saved {len(rows)} interactions to CloudSQL mock")
+            return
+
+        await self.connect()
+        await self._copy_interactions([self._interaction_row(*row) for row in rows])
+
+    async def get_user_history(self, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
         """
         Get recent user history.
         """
@@ -73,9 +217,10 @@ class CloudSQLClient:
             user_history = [h for h in self.mock_history if h["user_id"] == user_id]
             return user_history[-limit:]
 
-        with psycopg.connect(self.conn_str, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        await self.connect()
+        async with self.pool.connection() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await cur.execute(
                     """
                     SELECT query_text, response_text, timestamp 
                     FROM user_query_history 
@@ -85,28 +230,76 @@ class CloudSQLClient:
                     """,
                     (user_id, limit)
                 )
-                return cur.fetchall()
+                return await cur.fetchall()
 
-    def search_memory(self, user_id: str, query_embedding: List[float], limit: int = 5) -> List[Dict[str, Any]]:
+    async def get_recent_queries(self, limit: int = 100, hours: int = 24) -> List[str]:
         """
-        Semantic search over user's conversation history.
+        Most frequent queries across all users in the last `hours` hours.
         """
         if self.mock_mode:
-            # Return empty or random for mock
-            return []
+            counts: Dict[str, int] = {}
+            for h in self.mock_history:
+                counts[h["query_text"]] = counts.get(h["query_text"], 0) + 1
+            return sorted(counts, key=counts.get, reverse=True)[:limit]
 
-        with psycopg.connect(self.conn_str, row_factory=dict_row) as conn:
-            register_vector(conn)
-            with conn.cursor() as cur:
-                cur.execute(
+        await self.connect()
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     """
-                    SELECT query_text, response_text, timestamp, 
-                           1 - (embedding <=> %s) as similarity
-                    FROM user_query_history 
-                    WHERE user_id = %s 
-                    ORDER BY similarity DESC 
+                    SELECT query_text
+                    FROM user_query_history
+                    WHERE timestamp > now() - make_interval(hours => %s)
+                    GROUP BY query_text
+                    ORDER BY count(*) DESC
                     LIMIT %s
                     """,
-                    (query_embedding, user_id, limit)
+                    (hours, limit)
                 )
-                return cur.fetchall()
+                return [row[0] for row in await cur.fetchall()]
+
+    async def search_memory(self, user_id: str, query_embedding: List[float], limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Semantic search over user's conversation history.
+        """
+        if self.mock_mode:
+            # Return empty or random for mock
+            return []
+
+        await self.connect()
+        async with self.pool.connection() as conn:
+            # SET LOCAL needs a transaction; the pool's connections are autocommit
+            async with conn.transaction():
+                async with conn.cursor(row_factory=dict_row) as cur:
+                    # HNSW filters user_id after traversal; widen the candidate list so
+                    # enough of the user's rows survive to fill the limit
+                    ef_search = max(settings.postgres.hnsw_ef_search, limit * 8)
+                    await cur.execute(
+                        "SELECT set_config('hnsw.ef_search', %s, true)",
+                        (str(ef_search),)
+                    )
+                    if settings.postgres.hnsw_iterative_scan:
+                        # pgvector >= 0.8: keep scanning the index until the limit is met
+                        await cur.execute("SELECT set_config('hnsw.iterative_scan', 'strict_order', true)")
+                    # ORDER BY must be the bare distance (ascending) for the HNSW index to apply;
+                    # the subquery evaluates <=> once per row and derives similarity from it.
+                    # %(q)b sends the query vector as raw fp16 rather than a text literal, and the
+                    # statement is prepared up front since every memory lookup reuses it
+                    await cur.execute(
+                        """
+                        SELECT query_text, response_text, timestamp, 
+                               1 - distance as similarity
+                        FROM (
+                            SELECT query_text, response_text, timestamp, 
+                                   embedding <=> %(q)b as distance
+                            FROM user_query_history 
+                            WHERE user_id = %(u)s 
+                            ORDER BY distance 
+                            LIMIT %(k)s
+                        ) nearest
+                        ORDER BY distance
+                        """,
+                        {"q": HalfVector(query_embedding), "u": user_id, "k": limit},
+                        prepare=True
+                    )
+                    return await cur.fetchall()
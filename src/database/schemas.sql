@@ -2,7 +2,7 @@
 -- PostgreSQL Schema (Cloud SQL)
 -- ============================================
 
--- Enable pgvector extension
+-- Enable pgvector extension (halfvec needs pgvector >= 0.7)
 CREATE EXTENSION IF NOT EXISTS vector;
 
 -- User Query History Table (Memory)
@@ -11,15 +11,28 @@ CREATE TABLE IF NOT EXISTS user_query_history (
     user_id VARCHAR(255) NOT NULL,
     query_text TEXT NOT NULL,
     response_text TEXT NOT NULL,
-    embedding vector(768),
+    embedding halfvec(768), -- fp16: half the bytes per row and per index page
     timestamp TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     metadata JSONB DEFAULT '{}'::jsonb
 );
 
 -- Create index for vector search
+-- Only used when queries ORDER BY embedding <=> $1 (ascending) with a LIMIT
 CREATE INDEX IF NOT EXISTS idx_query_embedding 
 ON user_query_history 
-USING hnsw (embedding vector_cosine_ops);
+USING hnsw (embedding halfvec_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- Migrating an existing vector(768) column:
+-- DROP INDEX IF EXISTS idx_query_embedding;
+-- ALTER TABLE user_query_history ALTER COLUMN embedding TYPE halfvec(768) USING embedding::halfvec(768);
+-- then re-run the CREATE INDEX above
+
+-- Lets the planner choose a user_id index scan + exact kNN over the user's rows
+-- instead of an HNSW scan that post-filters on user_id; run ANALYZE so it can
+-- estimate which plan is cheaper for a given user
+CREATE INDEX IF NOT EXISTS idx_query_history_user_id
+ON user_query_history (user_id);
 
 
 -- ============================================
@@ -3,21 +3,40 @@ Snowflake client for analytics and feedback loops.
 Leverages Snowflake Cortex for vector operations.
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional
 import snowflake.connector
 from snowflake.connector import DictCursor
 
+from src.database.batching import next_batch
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Queued feedback is flushed every FEEDBACK_FLUSH_INTERVAL seconds or FEEDBACK_BATCH_SIZE rows
+FEEDBACK_BATCH_SIZE = 100
+FEEDBACK_FLUSH_INTERVAL = 1.0
+
+FEEDBACK_INSERT = """
+        INSERT INTO RAG_FEEDBACK_LOGS 
+        (QUERY_ID, USER_ID, PROMPT_TEXT, RETRIEVED_DOC_IDS, RESPONSE_TEXT, FEEDBACK_SCORE, CORRECTION_COMMENT)
+        VALUES (%(query_id)s, %(user_id)s, %(prompt_text)s, %(retrieved_doc_ids)s, %(response_text)s, %(feedback_score)s, %(correction_comment)s)
+        """
+
 class SnowflakeClient:
     """
     Client for Snowflake Data Warehouse.
     """
     
     def __init__(self):
+        self._feedback_queue: asyncio.Queue = asyncio.Queue()
+        self._flusher_task: Optional[asyncio.Task] = None
+        # One long-lived connection: Snowflake authentication costs hundreds of ms
+        self._conn: Optional[snowflake.connector.SnowflakeConnection] = None
+        self._conn_lock = threading.Lock()
+        
         if not settings.snowflake:
             logger.warning("Snowflake settings not configured. Client disabled.")
             self.enabled = False
@@ -30,31 +49,93 @@ class SnowflakeClient:
             "account": settings.snowflake.snowflake_account,
             "warehouse": settings.snowflake.snowflake_warehouse,
             "database": settings.snowflake.snowflake_database,
-            "schema": settings.snowflake.snowflake_schema
+            "schema": settings.snowflake.snowflake_schema,
+            "client_session_keep_alive": True
         }
 
-    def log_feedback(self, feedback_data: Dict[str, Any]):
+    async def start(self):
+        """Start the background task that flushes queued feedback."""
+        if self.enabled and self._flusher_task is None:
+            self._flusher_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """Flush queued feedback and stop the background task."""
+        if self._flusher_task is not None:
+            await self._feedback_queue.put(None)
+            await self._flusher_task
+            self._flusher_task = None
+        await asyncio.to_thread(self._reset_connection)
+
+    def _execute(self, fn, cursor_class=None):
         """
-        Log user feedback to Snowflake.
+        Run fn(cursor) on the shared connection, connecting on first use.
+        
+        Calls are serialized (a connection is not safe to share between threads),
+        and a failed call drops the connection so the next one reconnects.
+        """
+        with self._conn_lock:
+            try:
+                if self._conn is None or self._conn.is_closed():
+                    self._conn = snowflake.connector.connect(**self.conn_params)
+                if cursor_class is None:
+                    cursor = self._conn.cursor()
+                else:
+                    cursor = self._conn.cursor(cursor_class)
+                with cursor as cur:
+                    return fn(cur)
+            except Exception:
+                self._reset_connection_locked()
+                raise
+
+    def _reset_connection(self):
+        with self._conn_lock:
+            self._reset_connection_locked()
+
+    def _reset_connection_locked(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def queue_feedback(self, feedback_data: Dict[str, Any]):
+        """
+        Queue user feedback for the next batched insert. Does not block.
         """
         if not self.enabled:
             return
+        self._feedback_queue.put_nowait(feedback_data)
 
-        query = """
-        INSERT INTO RAG_FEEDBACK_LOGS 
-        (QUERY_ID, USER_ID, PROMPT_TEXT, RETRIEVED_DOC_IDS, RESPONSE_TEXT, FEEDBACK_SCORE, CORRECTION_COMMENT)
-        VALUES (%(query_id)s, %(user_id)s, %(prompt_text)s, %(retrieved_doc_ids)s, %(response_text)s, %(feedback_score)s, %(correction_comment)s)
+    async def _flush_loop(self):
+        """Insert queued feedback in batches, off the event loop, until the None sentinel arrives."""
+        closing = False
+        while not closing:
+            rows, closing = await next_batch(self._feedback_queue, FEEDBACK_BATCH_SIZE, FEEDBACK_FLUSH_INTERVAL)
+            if rows:
+                await asyncio.to_thread(self.log_feedback_batch, rows)
+
+    def log_feedback(self, feedback_data: Dict[str, Any]):
         """
+        Log user feedback to Snowflake.
+        """
+        self.log_feedback_batch([feedback_data])
+
+    def log_feedback_batch(self, feedback_rows: List[Dict[str, Any]]):
+        """
+        Log a batch of user feedback to Snowflake in one multi-row insert.
+        """
+        if not self.enabled:
+            return
+        
+        for feedback_data in feedback_rows:
+            # Convert list to string for array storage if needed, or use VARIANT
+            if isinstance(feedback_data.get("retrieved_doc_ids"), list):
+                feedback_data["retrieved_doc_ids"] = str(feedback_data["retrieved_doc_ids"])
         
         try:
-            with snowflake.connector.connect(**self.conn_params) as conn:
-                with conn.cursor() as cur:
-                    # Convert list to string for array storage if needed, or use VARIANT
-                    if isinstance(feedback_data.get("retrieved_doc_ids"), list):
-                        feedback_data["retrieved_doc_ids"] = str(feedback_data["retrieved_doc_ids"])
-                        
-                    cur.execute(query, feedback_data)
-            logger.info("Logged feedback to Snowflake")
+            self._execute(lambda cur: cur.executemany(FEEDBACK_INSERT, feedback_rows))
+            logger.info(f"Logged {len(feedback_rows)} feedback rows to Snowflake")
         except Exception as e:
             logger.error(f"Failed to log feedback to Snowflake: {e}")
 
@@ -68,11 +149,8 @@ class SnowflakeClient:
         query = "SELECT SNOWFLAKE.CORTEX.EMBED_TEXT_768('snowflake-arctic-embed-m', %(text)s) as embedding"
         
         try:
-            with snowflake.connector.connect(**self.conn_params) as conn:
-                with conn.cursor(DictCursor) as cur:
-                    cur.execute(query, {"text": text})
-                    result = cur.fetchone()
-                    return result["embedding"] if result else []
+            result = self._execute(lambda cur: cur.execute(query, {"text": text}).fetchone(), DictCursor)
+            return result["embedding"] if result else []
         except Exception as e:
             logger.error(f"Cortex embedding failed: {e}")
             return []
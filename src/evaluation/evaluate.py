@@ -10,12 +10,13 @@ from ragas.metrics import (
     context_recall,
 )
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from src.agents.langgraph_workflow import RAGWorkflow
+from src.agents.langgraph_workflow import get_workflow
+from src.agents.llm_cache import close_http_client
 from config.settings import settings
 
 class RAGEvaluator:
     def __init__(self):
-        self.rag_workflow = RAGWorkflow()
+        self.rag_workflow = get_workflow()
         # Ragas needs its own LLM/Embeddings instances
         self.eval_llm = ChatOpenAI(
             model=settings.llm.openai_model,
@@ -26,30 +27,37 @@ class RAGEvaluator:
             api_key=settings.llm.openai_api_key
         )
 
-    async def generate_answers(self, questions: List[str], ground_truths: List[str]) -> Dict:
+    async def generate_answers(self, questions: List[str], ground_truths: List[str], concurrency: int = 8) -> Dict:
         """
         Run the RAG pipeline for a list of questions to generate answers and contexts.
+        Up to `concurrency` questions are in flight at once; output order matches input.
         """
         answers = []
         contexts = []
 
         print(f"Generating answers for {len(questions)} questions...")
         
-        for question in questions:
-            try:
-                result = await self.rag_workflow.app.ainvoke({
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def answer(question: str):
+            async with semaphore:
+                return await self.rag_workflow.app.ainvoke({
                     "question": question,
                     "iterations": 0
                 })
-                
-                answers.append(result.get("generation", ""))
-                # Ragas expects a list of strings for contexts
-                contexts.append(result.get("documents", []))
-                
-            except Exception as e:
-                print(f"Error processing question '{question}': {e}")
+        
+        results = await asyncio.gather(*(answer(q) for q in questions), return_exceptions=True)
+        
+        for question, result in zip(questions, results):
+            if isinstance(result, Exception):
+                print(f"Error processing question '{question}': {result}")
                 answers.append("Error")
                 contexts.append([])
+                continue
+            
+            answers.append(result.get("generation", ""))
+            # Ragas expects a list of strings for contexts
+            contexts.append(result.get("documents", []))
 
         return {
             "question": questions,
@@ -98,6 +106,8 @@ async def main():
     
     # 1. Generate Answers
     data = await evaluator.generate_answers(test_questions, test_ground_truths)
+    # The shared HTTP client is bound to this event loop
+    await close_http_client()
     
     # 2. Run Evaluation
     results = evaluator.run_evaluation(data)
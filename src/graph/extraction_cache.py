@@ -0,0 +1,87 @@
+"""
+Persistent cache for LLM graph extractions.
+Re-ingesting unchanged chunks and repeating queries skips the extraction call.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+
+# Recent results kept in memory in front of SQLite
+MEMORY_CACHE_SIZE = 4096
+
+
+class ExtractionCache:
+    """
+    On-disk store of extraction results keyed by (model, sha256(text)).
+
+    Results are kept as JSON in SQLite, next to the chunk embedding cache, with
+    an in-process LRU in front so boilerplate chunks repeated within a run skip
+    the disk read and JSON decode.
+    """
+
+    def __init__(self, model: str, cache_path: Optional[str] = None):
+        self.model = model
+        self.cache_path = Path(cache_path or settings.chunking.extraction_cache_path).expanduser()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._recent: OrderedDict = OrderedDict()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS extractions (key TEXT PRIMARY KEY, result TEXT)")
+        return self._conn
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}|{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, result: Dict[str, Any]):
+        self._recent[key] = result
+        self._recent.move_to_end(key)
+        if len(self._recent) > MEMORY_CACHE_SIZE:
+            self._recent.popitem(last=False)
+
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        key = self._key(text)
+        with self._lock:
+            if key in self._recent:
+                self._recent.move_to_end(key)
+                return self._recent[key]
+            row = self._connection().execute(
+                "SELECT result FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            result = json.loads(row[0])
+            self._remember(key, result)
+        return result
+
+    def set(self, text: str, result: Dict[str, Any], persist: bool = True):
+        """Store a result; with persist=False it is only kept in the bounded in-memory LRU."""
+        key = self._key(text)
+        with self._lock:
+            if persist:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO extractions (key, result) VALUES (?, ?)",
+                    (key, json.dumps(result))
+                )
+                conn.commit()
+            self._remember(key, result)
+
+    async def aget(self, text: str) -> Optional[Dict[str, Any]]:
+        """get() in a worker thread, keeping SQLite reads off the event loop."""
+        return await asyncio.to_thread(self.get, text)
+
+    async def aset(self, text: str, result: Dict[str, Any], persist: bool = True):
+        """set() in a worker thread; the commit fsyncs."""
+        await asyncio.to_thread(self.set, text, result, persist)
@@ -3,6 +3,7 @@ from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
+from src.graph.extraction_cache import ExtractionCache
 from config.settings import settings
 
 class Entity(BaseModel):
@@ -40,10 +41,15 @@ class GraphExtractor:
         ])
         
         self.chain = self.prompt | self.llm | self.parser
+        self.cache = ExtractionCache(settings.llm.openai_model)
 
-    async def extract(self, text: str) -> Dict[str, Any]:
+    async def extract(self, text: str, force: bool = False, persist: bool = True) -> Dict[str, Any]:
         """
         Extract entities and relationships from a text chunk.
+        Results are cached per model and text; pass force=True to re-extract,
+        e.g. after changing the prompt or schema. With persist=False (user
+        queries) results are only cached in memory, so the on-disk cache stays
+        bounded by the ingested corpus.
         """
         if settings.features.mock_mode:
             return {
@@ -51,11 +57,20 @@ class GraphExtractor:
                 "relationships": []
             }
             
+        if not force:
+            cached = await self.cache.aget(text)
+            if cached is not None:
+                return cached
+            
         try:
-            return await self.chain.ainvoke({
+            result = await self.chain.ainvoke({
                 "text": text,
                 "format_instructions": self.parser.get_format_instructions()
             })
         except Exception as e:
             print(f"Graph extraction failed: {e}")
             return {"entities": [], "relationships": []}
+        
+        # Failures above are not cached, so they are retried next time
+        await self.cache.aset(text, result, persist=persist)
+        return result
@@ -1,10 +1,38 @@
 import logging
+from collections import defaultdict
+from functools import lru_cache
 from typing import List, Dict, Any
 from neo4j import GraphDatabase, AsyncGraphDatabase
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+MAX_SUBGRAPH_DEPTH = 3
+SUBGRAPH_LIMIT = 50
+
+@lru_cache(maxsize=1)
+def get_driver():
+    """
+    Return the process-wide async driver.
+    
+    The driver owns the Bolt connection pool, so the ingestion pipeline and the
+    graph retriever share one pool instead of each opening their own.
+    """
+    return AsyncGraphDatabase.driver(
+        settings.neo4j.neo4j_uri,
+        auth=(settings.neo4j.neo4j_user, settings.neo4j.neo4j_password),
+        max_connection_pool_size=settings.neo4j.neo4j_pool_size,
+        connection_acquisition_timeout=settings.neo4j.neo4j_acquisition_timeout,
+        max_connection_lifetime=3600,
+        keep_alive=True
+    )
+
+async def close_driver():
+    """Close the shared driver on application shutdown."""
+    if get_driver.cache_info().currsize:
+        await get_driver().close()
+        get_driver.cache_clear()
+
 class Neo4jClient:
     """
     Client for Neo4j Graph Database.
@@ -12,14 +40,14 @@ class Neo4jClient:
     """
     
     def __init__(self):
-        # Use default credentials for now (should be in settings)
-        self.uri = "bolt://localhost:7687"
-        self.user = "neo4j"
-        self.password = "password"
-        self.driver = AsyncGraphDatabase.driver(self.uri, auth=(self.user, self.password))
+        self.uri = settings.neo4j.neo4j_uri
+        self.driver = get_driver()
         
     async def close(self):
-        await self.driver.close()
+        """
+        No-op: the driver is shared with every other client in the process.
+        Use close_driver() on application shutdown.
+        """
         
     async def verify_connectivity(self):
         """Check if Neo4j is reachable."""
@@ -47,6 +75,74 @@ class Neo4jClient:
         async with self.driver.session() as session:
             await session.run(query, name=name, properties=properties or {})
 
+    async def add_entities(self, entities: List[Dict[str, Any]]):
+        """
+        Add many nodes in one transaction.
+        
+        Each entity is {"label": ..., "name": ..., "properties": {...}}. Labels
+        cannot be query parameters, so rows are grouped into one UNWIND per label.
+        """
+        if not entities:
+            return
+        if settings.features.mock_mode:
+            logger.info(f"[MOCK] Added {len(entities)} entities")
+            return
+        
+        rows_by_label = defaultdict(list)
+        for entity in entities:
+            rows_by_label[entity["label"]].append({
+                "name": entity["name"],
+                "properties": entity.get("properties") or {}
+            })
+        
+        async def write(tx):
+            for label, rows in rows_by_label.items():
+                result = await tx.run(
+                    f"UNWIND $rows AS row "
+                    f"MERGE (n:{self._quote(label)} {{name: row.name}}) "
+                    "SET n += row.properties",
+                    rows=rows
+                )
+                await result.consume()
+        
+        async with self.driver.session() as session:
+            await session.execute_write(write)
+
+    async def add_relationships(self, relationships: List[Dict[str, Any]]):
+        """
+        Add many relationships in one transaction.
+        
+        Each relationship is {"source": ..., "target": ..., "type": ...}; rows are
+        grouped into one UNWIND per relationship type to keep edges typed.
+        """
+        if not relationships:
+            return
+        if settings.features.mock_mode:
+            logger.info(f"[MOCK] Added {len(relationships)} relations")
+            return
+        
+        rows_by_type = defaultdict(list)
+        for rel in relationships:
+            rows_by_type[rel["type"]].append({"source": rel["source"], "target": rel["target"]})
+        
+        async def write(tx):
+            for relation_type, rows in rows_by_type.items():
+                result = await tx.run(
+                    "UNWIND $rows AS row "
+                    "MATCH (a {name: row.source}), (b {name: row.target}) "
+                    f"MERGE (a)-[r:{self._quote(relation_type)}]->(b)",
+                    rows=rows
+                )
+                await result.consume()
+        
+        async with self.driver.session() as session:
+            await session.execute_write(write)
+
+    @staticmethod
+    def _quote(identifier: str) -> str:
+        """Backtick-quote a label or relationship type for safe interpolation."""
+        return "`" + identifier.replace("`", "``") + "`"
+
     async def add_relationship(self, source_name: str, target_name: str, relation_type: str):
         """
         Add a relationship between two nodes.
@@ -63,25 +159,24 @@ class Neo4jClient:
         async with self.driver.session() as session:
             await session.run(query, source_name=source_name, target_name=target_name)
             
-    async def query_subgraph(self, entity_name: str, depth: int = 1) -> List[Dict[str, Any]]:
+    async def query_subgraph(self, entity_name: str, depth: int = 1, limit: int = SUBGRAPH_LIMIT) -> List[Dict[str, Any]]:
         """
-        Retrieve connected nodes for a given entity.
+        Retrieve the distinct relationships within `depth` hops of an entity.
         """
         if settings.features.mock_mode:
             return [{"source": entity_name, "target": "RelatedEntity", "type": "RELATED_TO"}]
-            
+        
+        # Cypher cannot parameterize variable-length bounds, so the depth is
+        # coerced to a small int; only MAX_SUBGRAPH_DEPTH query texts ever exist
+        depth = min(max(int(depth), 1), MAX_SUBGRAPH_DEPTH)
         query = (
-            "MATCH (n {name: $name})-[r*1..%d]-(m) "
-            "RETURN n, r, m"
-        ) % depth
+            f"MATCH path = (n {{name: $name}})-[*1..{depth}]-(m) "
+            "UNWIND relationships(path) AS r "
+            "RETURN DISTINCT startNode(r).name AS source, endNode(r).name AS target, type(r) AS type "
+            "LIMIT $limit"
+        )
         
-        results = []
         async with self.driver.session() as session:
-            result = await session.run(query, name=entity_name)
-            async for record in result:
-                results.append({
-                    "source": record["n"]["name"],
-                    "target": record["m"]["name"],
-                    "type": type(record["r"]).__name__ # Simplified
-                })
-        return results
+            result = await session.run(query, name=entity_name, limit=limit)
+            # Rows are three short strings each, and LIMIT bounds how many arrive
+            return await result.data()
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import List, Dict, Any
 from src.graph.neo4j_client import Neo4jClient
@@ -23,7 +24,7 @@ class GraphRetriever:
         """
         # 1. Extract entities from query to know what to look for
         # We use the same extractor but applied to the query
-        extraction = await self.extractor.extract(query)
+        extraction = await self.extractor.extract(query, persist=False)
         entities = [e["name"] for e in extraction.get("entities", [])]
         
         if not entities:
@@ -32,16 +33,18 @@ class GraphRetriever:
             
         logger.info(f"Graph retrieval for entities: {entities}")
         
-        # 2. Query Neo4j for each entity
+        # 2. Query Neo4j for all entities concurrently
+        subgraphs = await asyncio.gather(
+            *(self.neo4j.query_subgraph(entity, depth=depth) for entity in entities)
+        )
+        
         graph_contexts = []
-        for entity in entities:
-            subgraph = await self.neo4j.query_subgraph(entity, depth=depth)
-            
+        for subgraph in subgraphs:
             # 3. Format results
             for relation in subgraph:
                 # Format: "Entity A is RELATED_TO Entity B"
                 context = f"{relation['source']} {relation['type']} {relation['target']}"
                 graph_contexts.append(context)
                 
-        # Deduplicate
-        return list(set(graph_contexts))
+        # Each subgraph is already distinct; drop overlaps between entities, keeping order
+        return list(dict.fromkeys(graph_contexts))
@@ -3,7 +3,9 @@ Advanced chunking strategies for technical documents.
 Implements Hierarchical Chunking and Semantic Boundary Detection.
 """
 
+import asyncio
 import logging
+from itertools import chain
 from typing import List, Dict, Any, Optional
 import re
 from dataclasses import dataclass
@@ -11,18 +13,33 @@ from dataclasses import dataclass
 from langchain_text_splitters import MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
 import numpy as np
+import xxhash
 
+from src.ingestion.embedding_cache import CachedEmbedder
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Texts per embeddings request (OpenAI's per-request input limit) and requests in flight
+EMBED_BATCH_SIZE = 2048
+EMBED_CONCURRENCY = 8
+
+# Preferred break points for child chunks, coarsest first
+SPLIT_SEPARATORS = ("\n\n", "\n", " ")
+
 @dataclass
 class Chunk:
     content: str
     metadata: Dict[str, Any]
     chunk_id: str
     parent_id: Optional[str] = None
-    embedding: Optional[List[float]] = None
+    # float16 keeps batch ingestion memory low (~3 KB vs ~43 KB of Python floats at 1536 dims)
+    embedding: Optional[np.ndarray] = None
+
+    @property
+    def embedding_f32(self) -> Optional[np.ndarray]:
+        """Embedding upcast to float32 for vector stores."""
+        return None if self.embedding is None else self.embedding.astype(np.float32)
 
 class ChunkingStrategy:
     """
@@ -46,17 +63,15 @@ class ChunkingStrategy:
             separators=["\n\n", "\n", " ", ""]
         )
         
-        # Child chunker (precise context)
-        self.child_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.chunking.chunk_size,
-            chunk_overlap=settings.chunking.chunk_overlap,
-            separators=["\n\n", "\n", " ", ""]
-        )
+        # Child chunker (precise context), see _fast_split
+        self.child_chunk_size = settings.chunking.chunk_size
+        self.child_chunk_overlap = settings.chunking.chunk_overlap
         
-        self.embeddings = OpenAIEmbeddings(
+        # Unchanged text is served from the on-disk cache on re-ingestion
+        self.embeddings = CachedEmbedder(OpenAIEmbeddings(
             model=settings.llm.embedding_model,
             api_key=settings.llm.openai_api_key
-        )
+        ))
 
     def hierarchical_chunking(self, markdown_text: str, base_metadata: Dict[str, Any]) -> List[Chunk]:
         """
@@ -74,7 +89,9 @@ class ChunkingStrategy:
             parent_metadata.update(base_metadata)
             parent_metadata["type"] = "parent"
             
-            parent_id = f"{base_metadata.get('filename', 'doc')}_{hash(parent_content)}"
+            # Content-addressed (unlike the per-process salted hash()), so re-ingesting
+            # a document reproduces its IDs and vector store upserts stay idempotent
+            parent_id = f"{base_metadata.get('filename', 'doc')}_{xxhash.xxh3_64_hexdigest(parent_content.encode('utf-8'))}"
             
             chunks.append(Chunk(
                 content=parent_content,
@@ -83,9 +100,9 @@ class ChunkingStrategy:
             ))
             
             # Create Child Chunks
-            child_docs = self.child_splitter.create_documents([parent_content])
+            child_texts = self._fast_split(parent_content, self.child_chunk_size, self.child_chunk_overlap)
             
-            for i, child in enumerate(child_docs):
+            for i, child_text in enumerate(child_texts):
                 child_metadata = parent_metadata.copy()
                 child_metadata["type"] = "child"
                 child_metadata["parent_id"] = parent_id
@@ -94,7 +111,7 @@ class ChunkingStrategy:
                 child_id = f"{parent_id}_child_{i}"
                 
                 chunks.append(Chunk(
-                    content=child.page_content,
+                    content=child_text,
                     metadata=child_metadata,
                     chunk_id=child_id,
                     parent_id=parent_id
@@ -102,6 +119,44 @@ class ChunkingStrategy:
                 
         return chunks
 
+    @staticmethod
+    def _fast_split(text: str, size: int, overlap: int) -> List[str]:
+        """
+        Greedily pack text into windows of at most `size` characters.
+        
+        Each window ends at the last paragraph, line or word break in its second
+        half (in that order of preference), or is cut hard when there is none.
+        The next window starts up to `overlap` characters earlier, on a word
+        boundary. Positions are tracked as offsets and only emitted chunks are
+        sliced out, unlike RecursiveCharacterTextSplitter which splits and
+        re-joins every piece.
+        """
+        n = len(text)
+        chunks = []
+        start = 0
+        
+        while start < n:
+            end = min(start + size, n)
+            if end < n:
+                for sep in SPLIT_SEPARATORS:
+                    cut = text.rfind(sep, start + size // 2, end)
+                    if cut != -1:
+                        end = cut
+                        break
+            
+            chunk = text[start:end].strip()
+            if chunk:
+                chunks.append(chunk)
+            if end >= n:
+                break
+            
+            # Step back for overlap, then forward to the next word start
+            next_start = max(end - overlap, start + 1)
+            space = text.find(" ", next_start, end)
+            start = space + 1 if space != -1 and next_start > start + 1 else next_start
+            
+        return chunks
+
     def semantic_boundary_chunking(self, text: str, threshold: float = 0.6) -> List[str]:
         """
         Split text based on semantic similarity changes between sentences.
@@ -113,34 +168,53 @@ class ChunkingStrategy:
         if not sentences:
             return []
             
-        # Get embeddings for all sentences
-        embeddings = self.embeddings.embed_documents(sentences)
+        # Get embeddings for all sentences, normalized so dot products are cosines
+        embeddings = np.asarray(self.embeddings.embed_documents(sentences), dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings /= np.where(norms == 0, 1, norms)
         
-        chunks = []
-        current_chunk = [sentences[0]]
+        # Similarity of each sentence to the next, in one vectorized pass
+        sims = np.einsum("ij,ij->i", embeddings[:-1], embeddings[1:])
+        boundaries = np.flatnonzero(sims < threshold) + 1
         
-        for i in range(1, len(sentences)):
-            sim = np.dot(embeddings[i-1], embeddings[i])
-            
-            if sim >= threshold:
-                current_chunk.append(sentences[i])
-            else:
-                chunks.append(" ".join(current_chunk))
-                current_chunk = [sentences[i]]
-                
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
-            
-        return chunks
+        starts = [0, *boundaries.tolist()]
+        ends = [*boundaries.tolist(), len(sentences)]
+        return [" ".join(sentences[start:end]) for start, end in zip(starts, ends)]
 
     async def embed_chunks(self, chunks: List[Chunk]) -> List[Chunk]:
         """
         Generate embeddings for a list of chunks.
         """
-        texts = [chunk.content for chunk in chunks]
-        embeddings = await self.embeddings.aembed_documents(texts)
+        await self.embed_many([chunks])
+        return chunks
+
+    async def embed_many(self, chunk_lists: List[List[Chunk]]) -> List[List[Chunk]]:
+        """
+        Embed chunks from many documents together.
+        
+        Identical contents are embedded once, and the unique texts are sent in
+        large batches with a bounded number of requests in flight.
+        """
+        chunks = list(chain.from_iterable(chunk_lists))
+        unique_texts = list(dict.fromkeys(chunk.content for chunk in chunks))
+        if not unique_texts:
+            return chunk_lists
+        
+        semaphore = asyncio.Semaphore(EMBED_CONCURRENCY)
         
-        for chunk, embedding in zip(chunks, embeddings):
-            chunk.embedding = embedding
+        async def embed_batch(texts: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self.embeddings.aembed_documents(texts)
+        
+        batches = [unique_texts[i:i + EMBED_BATCH_SIZE] for i in range(0, len(unique_texts), EMBED_BATCH_SIZE)]
+        results = await asyncio.gather(*[embed_batch(batch) for batch in batches])
+        vectors = {
+            text: np.asarray(vector, dtype=np.float16)
+            for text, vector in zip(unique_texts, chain.from_iterable(results))
+        }
+        
+        for chunk in chunks:
+            chunk.embedding = vectors[chunk.content]
             
-        return chunks
+        logger.info(f"Embedded {len(unique_texts)} unique texts for {len(chunks)} chunks")
+        return chunk_lists
@@ -3,7 +3,9 @@ Docling-based PDF parser service.
 Handles high-fidelity extraction of tables, equations, and hierarchical structure.
 """
 
+import io
 import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 import json
@@ -16,6 +18,18 @@ from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# One parser per worker process; the converter and its models are not picklable
+_worker_parser: Optional["DoclingParser"] = None
+
+def init_parser_worker():
+    """ProcessPoolExecutor initializer: load Docling models once per worker."""
+    global _worker_parser
+    _worker_parser = DoclingParser()
+
+def parse_in_worker(file_path: str) -> Dict[str, Any]:
+    """Parse a PDF with the worker process's parser."""
+    return _worker_parser.parse_pdf(file_path)
+
 class DoclingParser:
     """
     Advanced PDF parser using Docling.
@@ -38,20 +52,21 @@ class DoclingParser:
             }
         )
         
-    def parse_pdf(self, file_path: str) -> Dict[str, Any]:
+    def parse_pdf(self, file_path: str, include_structure: bool = False) -> Dict[str, Any]:
         """
         Parse a PDF file and return structured content.
         
         Args:
             file_path: Absolute path to the PDF file
+            include_structure: Also export the full Docling document tree
             
         Returns:
             Dictionary containing:
             - markdown: Full markdown representation
-            - tables: List of extracted tables
+            - tables: List of extracted tables, each holding a pandas DataFrame
             - images: List of extracted images (metadata and paths)
             - metadata: Document metadata
-            - structure: Hierarchical document structure
+            - json_structure: Hierarchical document structure, or None unless requested
         """
         path = Path(file_path)
         if not path.exists():
@@ -67,11 +82,12 @@ class DoclingParser:
             # Serialize to Markdown
             markdown_content = doc.export_to_markdown()
             
-            # Extract tables
+            # Extract tables; DataFrames stay columnar (and pickle compactly back from
+            # worker processes) until a consumer serializes them
             tables = []
             for table in doc.tables:
                 tables.append({
-                    "data": table.export_to_dataframe().to_dict(orient="records"),
+                    "data": table.export_to_dataframe(),
                     "caption": table.caption_text(doc) if hasattr(table, "caption_text") else None,
                     "page_no": table.prov[0].page_no if table.prov else None
                 })
@@ -79,15 +95,14 @@ class DoclingParser:
             # Extract images
             images = []
             # Note: In recent Docling versions, pictures might be accessed via doc.pictures
-            # We will iterate and extract basic info. 
-            # Actual image saving would happen here if we wanted to persist them to disk.
             if hasattr(doc, "pictures"):
                 for i, picture in enumerate(doc.pictures):
                     images.append({
                         "id": f"img_{i}",
                         "page_no": picture.prov[0].page_no if picture.prov else None,
                         "caption": picture.caption_text(doc) if hasattr(picture, "caption_text") else None,
-                        # "image_data": picture.image  # PIL Image object (omitted for JSON serialization)
+                        # Raw PNG bytes; base64 is only applied at the VLM request boundary
+                        "image_bytes": self._png_bytes(picture.get_image(doc)) if hasattr(picture, "get_image") else None
                     })
                 
             # Extract metadata
@@ -103,26 +118,41 @@ class DoclingParser:
                 "tables": tables,
                 "images": images,
                 "metadata": metadata,
-                "json_structure": doc.export_to_dict()
+                "json_structure": doc.export_to_dict() if include_structure else None
             }
             
         except Exception as e:
             logger.error(f"Error parsing PDF {file_path}: {str(e)}")
             raise
 
-    def batch_process(self, directory_path: str) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _png_bytes(image) -> Optional[bytes]:
+        """Encode a PIL image (from generate_picture_images) as PNG bytes."""
+        if image is None:
+            return None
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue() or None
+
+    def batch_process(self, directory_path: str, max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        Process all PDFs in a directory.
+        Process all PDFs in a directory, parsing in parallel worker processes.
+        
+        OCR and layout inference are CPU-bound and hold the GIL, so threads
+        would not help. Results are returned in completion order.
         """
         path = Path(directory_path)
         results = []
         
-        for file_path in path.glob("*.pdf"):
-            try:
-                result = self.parse_pdf(str(file_path))
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Failed to process {file_path}: {e}")
-                continue
+        with ProcessPoolExecutor(
+            max_workers=max_workers or settings.api.ingest_workers,
+            initializer=init_parser_worker
+        ) as executor:
+            futures = {executor.submit(parse_in_worker, str(p)): p for p in path.glob("*.pdf")}
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    logger.error(f"Failed to process {futures[future]}: {e}")
                 
         return results
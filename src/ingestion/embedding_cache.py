@@ -0,0 +1,99 @@
+"""
+Persistent embedding cache for ingestion.
+Re-ingesting unchanged text skips the embedding API entirely.
+"""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CachedEmbedder:
+    """
+    Wraps a LangChain embeddings model with an on-disk cache keyed by content hash.
+
+    Vectors are stored as float16 in SQLite, halving the cache size; only texts
+    missing from the cache are sent to the wrapped model.
+    """
+
+    def __init__(self, embeddings, cache_path: Optional[str] = None):
+        self.embeddings = embeddings
+        self.model = getattr(embeddings, "model", "default")
+        self.cache_path = Path(cache_path or settings.chunking.embedding_cache_path).expanduser()
+        self._conn: Optional[sqlite3.Connection] = None
+        # Chunking can run in worker threads
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+        return self._conn
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}|{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            conn = self._connection()
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float16).astype(np.float32).tolist()
+        return found
+
+    def _store(self, keys: List[str], vectors: List[List[float]]):
+        rows = [(key, np.asarray(vector, dtype=np.float16).tobytes()) for key, vector in zip(keys, vectors)]
+        with self._lock:
+            conn = self._connection()
+            conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+            conn.commit()
+
+    def _split(self, texts: List[str]):
+        """Return (keys, cached vectors, unique missing texts) for a request."""
+        keys = [self._key(text) for text in texts]
+        cached = self._lookup(list(dict.fromkeys(keys)))
+        missing = list(dict.fromkeys(text for text, key in zip(texts, keys) if key not in cached))
+        return keys, cached, missing
+
+    def _merge(self, keys: List[str], cached: Dict[str, List[float]], missing: List[str], vectors: List[List[float]]):
+        if missing:
+            missing_keys = [self._key(text) for text in missing]
+            self._store(missing_keys, vectors)
+            cached.update(zip(missing_keys, vectors))
+        logger.debug(f"Embedding cache: {len(keys) - len(missing)} hits, {len(missing)} misses")
+        return [cached[key] for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, cached, missing = self._split(texts)
+        vectors = self.embeddings.embed_documents(missing) if missing else []
+        return self._merge(keys, cached, missing, vectors)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        # SQLite reads and commits run in a worker thread so ingestion does not stall serving
+        keys, cached, missing = await asyncio.to_thread(self._split, texts)
+        vectors = await self.embeddings.aembed_documents(missing) if missing else []
+        return await asyncio.to_thread(self._merge, keys, cached, missing, vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
@@ -5,10 +5,14 @@ Coordinates parsing, chunking, and indexing.
 
 import logging
 import asyncio
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Union
 from pathlib import Path
 
-from src.ingestion.docling_parser import DoclingParser
+import anyio
+
+from src.ingestion.docling_parser import DoclingParser, init_parser_worker, parse_in_worker
 from src.ingestion.chunking_strategy import ChunkingStrategy, Chunk
 from src.ingestion.vlm_client import VLMClient
 from src.graph.extractor import GraphExtractor
@@ -20,6 +24,10 @@ from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Graph extraction and image captioning LLM calls in flight per document
+EXTRACT_CONCURRENCY = 8
+CAPTION_CONCURRENCY = 8
+
 class IngestionPipeline:
     """
     End-to-end ingestion pipeline.
@@ -32,65 +40,115 @@ class IngestionPipeline:
         self.graph_extractor = GraphExtractor()
         self.neo4j = Neo4jClient()
         # self.search_engine = HybridSearchEngine() # To be injected
+        self._cpu_limiter: Optional[anyio.CapacityLimiter] = None
+    
+    async def _run_cpu_bound(self, func: Callable, *args, **kwargs) -> Any:
+        """Run blocking parse/chunk work in a worker thread so the event loop stays free."""
+        if self._cpu_limiter is None:
+            # Created lazily: a limiter needs a running event loop
+            self._cpu_limiter = anyio.CapacityLimiter(settings.api.ingest_workers)
+        return await anyio.to_thread.run_sync(partial(func, *args, **kwargs), limiter=self._cpu_limiter)
         
     async def process_document(self, file_path: str) -> Dict[str, Any]:
         """
         Process a single document from PDF to indexed chunks.
         """
-        logger.info(f"Starting ingestion for {file_path}")
+        logger.info("Starting ingestion for %s", file_path)
         
         # 1. Parse PDF
-        parsed_data = self.parser.parse_pdf(file_path)
+        parsed_data = await self._run_cpu_bound(self.parser.parse_pdf, file_path)
+        return await self._process_parsed(parsed_data)
+
+    async def _process_parsed(self, parsed_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Caption images, chunk, and extract the graph for an already parsed document.
+        """
         markdown_content = parsed_data["markdown"]
         metadata = parsed_data["metadata"]
         images = parsed_data.get("images", [])
         
         # 2. Process Images (Multi-Modal)
         if images:
-            logger.info(f"Found {len(images)} images. Generating captions...")
+            logger.info("Found %d images. Generating captions...", len(images))
+            # Repeated logos and figure templates are byte-identical; caption each
+            # distinct image once and share the result
+            by_content: Dict[Union[bytes, str], List[Dict[str, Any]]] = {}
             for img in images:
-                image_data = img.get("image_data_base64", "") 
+                image_data = img.get("image_bytes") or img.get("image_data_base64")
                 if image_data:
-                    caption = await self.vlm.generate_caption(image_data)
-                    img["generated_caption"] = caption
-                    markdown_content += f"\n\n![Image: {caption}]\n"
+                    by_content.setdefault(image_data, []).append(img)
+            semaphore = asyncio.Semaphore(CAPTION_CONCURRENCY)
+            
+            async def caption(image_data: Union[bytes, str]) -> Optional[str]:
+                async with semaphore:
+                    return await self.vlm.generate_caption(image_data)
+            
+            captions = await asyncio.gather(*(caption(image_data) for image_data in by_content))
+            succeeded = []
+            failures = 0
+            for same_images, text in zip(by_content.values(), captions):
+                if not text:
+                    failures += len(same_images)
+                    continue
+                for img in same_images:
+                    img["generated_caption"] = text
+                succeeded.append(text)
+            # One join instead of re-copying the whole document per image; failed
+            # captions are left out rather than indexed as placeholder text, and
+            # duplicate images add their caption once
+            markdown_content = "".join([markdown_content, *(f"\n\n![Image: {text}]\n" for text in succeeded)])
+            await self.vlm.persist()
             
-            metadata["image_count"] = len(images)
+            metadata["image_count"] = sum(1 for img in images if img.get("generated_caption"))
+            metadata["captioning_failures"] = failures
         
         # 3. Chunking
         logger.info("Chunking document...")
-        chunks = self.chunker.hierarchical_chunking(markdown_content, metadata)
-        logger.info(f"Generated {len(chunks)} chunks")
+        chunks = await self._run_cpu_bound(self.chunker.hierarchical_chunking, markdown_content, metadata)
+        logger.info("Generated %d chunks", len(chunks))
         
         # 4. Graph Extraction & Indexing
-        logger.info("Extracting knowledge graph...")
-        graph_nodes = 0
-        graph_edges = 0
+        entities = []
+        relationships = []
         
         # We only extract from parent chunks to save tokens/time
-        parent_chunks = [c for c in chunks if c.metadata.get("level") == "parent"]
+        # (hierarchical_chunking tags them with metadata["type"])
+        parent_chunks = [c for c in chunks if c.metadata.get("type") == "parent"]
+        if parent_chunks:
+            logger.info("Extracting knowledge graph from %d parent chunks...", len(parent_chunks))
         
-        for chunk in parent_chunks:
-            graph_data = await self.graph_extractor.extract(chunk.content)
-            
-            # Store in Neo4j
+        semaphore = asyncio.Semaphore(EXTRACT_CONCURRENCY)
+        
+        async def extract(chunk: Chunk) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.graph_extractor.extract(chunk.content)
+        
+        extractions = await asyncio.gather(*(extract(chunk) for chunk in parent_chunks))
+        
+        for graph_data in extractions:
             for entity in graph_data.get("entities", []):
-                await self.neo4j.add_entity(
-                    label=entity["type"], 
-                    name=entity["name"],
-                    properties={"source_doc": metadata["filename"]}
-                )
-                graph_nodes += 1
+                entities.append({
+                    "label": entity["type"],
+                    "name": entity["name"],
+                    "properties": {"source_doc": metadata["filename"]}
+                })
                 
             for rel in graph_data.get("relationships", []):
-                await self.neo4j.add_relationship(
-                    source_name=rel["source"],
-                    target_name=rel["target"],
-                    relation_type=rel["type"]
-                )
-                graph_edges += 1
+                relationships.append({
+                    "source": rel["source"],
+                    "target": rel["target"],
+                    "type": rel["type"]
+                })
+        
+        # Store in Neo4j as two batched writes; nodes first so relationships can match them
+        if entities:
+            await self.neo4j.add_entities(entities)
+        if relationships:
+            await self.neo4j.add_relationships(relationships)
+        graph_nodes = len(entities)
+        graph_edges = len(relationships)
                 
-        logger.info(f"Graph extraction complete: {graph_nodes} nodes, {graph_edges} edges")
+        logger.info("Graph extraction complete: %d nodes, %d edges", graph_nodes, graph_edges)
         
         # 5. Embedding (Optional here, can be done during indexing)
         # chunks = await self.chunker.embed_chunks(chunks)
@@ -106,19 +164,40 @@ class IngestionPipeline:
             "graph_stats": {"nodes": graph_nodes, "edges": graph_edges}
         }
 
-    async def batch_ingest(self, directory_path: str):
+    async def batch_ingest(self, directory_path: str) -> List[Dict[str, Any]]:
         """
         Ingest all PDFs in a directory.
+        
+        Returns one {"path": ..., "result": ...} entry per file, where result is
+        the document summary or the exception it failed with, so callers can
+        retry just the failed paths.
+        
+        Parsing runs in a process pool so documents are parsed on all cores;
+        the I/O-bound stages after it overlap on the event loop. At most
+        `ingest_max_parallel_docs` documents are in flight, so a large directory
+        does not flood the LLM backends or hold every parsed document in memory.
         """
         path = Path(directory_path)
-        tasks = []
+        loop = asyncio.get_running_loop()
+        doc_semaphore = asyncio.Semaphore(settings.api.ingest_max_parallel_docs)
         
-        for file_path in path.glob("*.pdf"):
-            tasks.append(self.process_document(str(file_path)))
+        with ProcessPoolExecutor(
+            max_workers=settings.api.ingest_workers,
+            initializer=init_parser_worker
+        ) as executor:
+            async def ingest(file_path: str) -> Dict[str, Any]:
+                async with doc_semaphore:
+                    logger.info("Starting ingestion for %s", file_path)
+                    parsed_data = await loop.run_in_executor(executor, parse_in_worker, file_path)
+                    return await self._process_parsed(parsed_data)
             
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+            paths = [str(file_path) for file_path in path.glob("*.pdf")]
+            results = await asyncio.gather(
+                *[ingest(file_path) for file_path in paths],
+                return_exceptions=True
+            )
         
         success_count = sum(1 for r in results if isinstance(r, dict) and r.get("status") == "success")
-        logger.info(f"Batch ingestion complete. Success: {success_count}/{len(results)}")
-        return results
+        logger.info("Batch ingestion complete. Success: %d/%d", success_count, len(results))
+        return [{"path": p, "result": r} for p, r in zip(paths, results)]
 
@@ -1,12 +1,28 @@
+import asyncio
 import base64
+import binascii
+import hashlib
+import json
 import logging
-from typing import Optional
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
+from src.agents.llm_cache import get_http_client
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Captions kept in the LRU cache (and its on-disk copy)
+CAPTION_CACHE_SIZE = 2048
+
+# Static text part of every caption request, shared rather than rebuilt per image
+CAPTION_PROMPT = {
+    "type": "text",
+    "text": "Describe this image in detail, focusing on any data, charts, or text visible. Provide a concise summary suitable for search indexing."
+}
+
 class VLMClient:
     """
     Vision Language Model Client for image captioning.
@@ -14,35 +30,99 @@ class VLMClient:
     """
     
     def __init__(self):
-        self.llm = ChatOpenAI(
-            model="gpt-4o", # Use multimodal model
-            api_key=settings.llm.openai_api_key,
-            max_tokens=300
-        )
+        # Mock runs never call the model, so skip building the client
+        self.llm: Optional[ChatOpenAI] = None
+        if not settings.features.mock_mode:
+            self.llm = ChatOpenAI(
+                model="gpt-4o", # Use multimodal model
+                api_key=settings.llm.openai_api_key,
+                max_tokens=300,
+                http_async_client=get_http_client()
+            )
+        # Identical images recur across PDFs (logos, repeated figures); captions are
+        # cached by content hash, least recently used first out
+        self.cache_path = Path(settings.chunking.caption_cache_path).expanduser()
+        self._captions: Optional[OrderedDict] = None
+        self._cache_lock = asyncio.Lock()
+        self._dirty = False
+
+    def _load_captions(self) -> OrderedDict:
+        if self._captions is None:
+            self._captions = OrderedDict()
+            if self.cache_path.exists():
+                try:
+                    self._captions.update(json.loads(self.cache_path.read_text()))
+                except (OSError, ValueError) as e:
+                    logger.warning("Ignoring unreadable caption cache %s: %s", self.cache_path, e)
+        return self._captions
+
+    async def persist(self):
+        """Write the caption cache to disk if it changed, so reruns skip known images."""
+        async with self._cache_lock:
+            if not self._dirty:
+                return
+            snapshot = json.dumps(self._load_captions())
+            self._dirty = False
         
-    async def generate_caption(self, image_base64: str) -> str:
+        def write():
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_suffix(".tmp")
+            tmp_path.write_text(snapshot)
+            tmp_path.replace(self.cache_path)
+        
+        await asyncio.to_thread(write)
+        
+    async def generate_caption(self, image: Union[bytes, str]) -> Optional[str]:
         """
-        Generate a description for an image.
+        Generate a description for an image, given as raw bytes or a base64 string.
+        Returns None if the VLM call fails.
         """
         if settings.features.mock_mode:
             return "A mock description of the image containing charts and data."
+        
+        # Key on the decoded image bytes so raw and base64 inputs share one entry
+        if isinstance(image, bytes):
+            raw = image
+        else:
+            try:
+                raw = base64.b64decode(image)
+            except (binascii.Error, ValueError):
+                # Not valid base64; key on the text as given
+                raw = image.encode("utf-8")
+        mm_hash = hashlib.sha256(raw).hexdigest()
+        async with self._cache_lock:
+            captions = self._load_captions()
+            if mm_hash in captions:
+                captions.move_to_end(mm_hash)
+                return captions[mm_hash]
+            
+        mime_type = "image/png" if raw.startswith(b"\x89PNG") else "image/jpeg"
+        encoded = base64.b64encode(image).decode("ascii") if isinstance(image, bytes) else image
+        image_url = f"data:{mime_type};base64,{encoded}"
             
         try:
             message = HumanMessage(
                 content=[
-                    {"type": "text", "text": "Describe this image in detail, focusing on any data, charts, or text visible. Provide a concise summary suitable for search indexing."},
+                    CAPTION_PROMPT,
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/jpeg;base64,{image_base64}"
+                            "url": image_url
                         },
                     },
                 ]
             )
             
             response = await self.llm.ainvoke([message])
-            return response.content
             
         except Exception as e:
-            logger.error(f"Failed to generate caption: {e}")
-            return "Error generating caption."
+            logger.error("Failed to generate caption: %s", e)
+            return None
+        
+        async with self._cache_lock:
+            captions = self._load_captions()
+            captions[mm_hash] = response.content
+            if len(captions) > CAPTION_CACHE_SIZE:
+                captions.popitem(last=False)
+            self._dirty = True
+        return response.content
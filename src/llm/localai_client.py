@@ -7,6 +7,8 @@ import logging
 from typing import Optional, AsyncGenerator, Dict, Any
 from openai import AsyncOpenAI
 
+from src.agents.llm_cache import get_http_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,10 +29,11 @@ class LocalAIClient:
         self.client = AsyncOpenAI(
             base_url=base_url,
             api_key=api_key,
-            timeout=timeout
+            timeout=timeout,
+            http_client=get_http_client()
         )
         
-        logger.info(f"Initialized LocalAI client: {self.base_url}, model={self.model}")
+        logger.info("Initialized LocalAI client: %s, model=%s", self.base_url, self.model)
     
     async def generate(
         self,
@@ -74,7 +77,7 @@ class LocalAIClient:
             return response.choices[0].message.content
             
         except Exception as e:
-            logger.error(f"LocalAI generation failed: {e}")
+            logger.error("LocalAI generation failed: %s", e)
             raise
     
     async def generate_stream(
@@ -122,7 +125,7 @@ class LocalAIClient:
                     yield chunk.choices[0].delta.content
                     
         except Exception as e:
-            logger.error(f"LocalAI streaming failed: {e}")
+            logger.error("LocalAI streaming failed: %s", e)
             raise
     
     async def chat(
@@ -160,7 +163,7 @@ class LocalAIClient:
             return response.choices[0].message.content
             
         except Exception as e:
-            logger.error(f"LocalAI chat failed: {e}")
+            logger.error("LocalAI chat failed: %s", e)
             raise
     
     async def list_models(self) -> list[str]:
@@ -174,7 +177,7 @@ class LocalAIClient:
             models = await self.client.models.list()
             return [model.id for model in models.data]
         except Exception as e:
-            logger.error(f"Failed to list models: {e}")
+            logger.error("Failed to list models: %s", e)
             return []
     
     async def health_check(self) -> bool:
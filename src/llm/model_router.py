@@ -2,17 +2,58 @@
 Model router for intelligent selection between cloud and local LLMs.
 """
 
+import asyncio
 import logging
+import re
+import time
+from functools import lru_cache
 from typing import Optional, Literal, AsyncGenerator
 from enum import Enum
 
 from openai import AsyncOpenAI
 from .ollama_client import OllamaClient
 from .localai_client import LocalAIClient
+from .streaming import coalesce
+from src.agents.llm_cache import get_http_client
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Seconds before a local provider's health result is considered stale
+HEALTH_TTL = 30.0
+
+TECHNICAL_TERMS = (
+    "algorithm", "implementation", "architecture", "optimization",
+    "performance", "scalability", "distributed", "machine learning",
+    "neural network", "deep learning", "database", "query"
+)
+# One scan for all terms; substring matches, like `term in query`
+TECHNICAL_TERMS_RE = re.compile("|".join(map(re.escape, TECHNICAL_TERMS)))
+
+
+@lru_cache(maxsize=1024)
+def _estimate_complexity(query: str) -> float:
+    """Memoized body of ModelRouter._estimate_complexity; retries and streams repeat queries."""
+    # Length factor
+    length_score = min(len(query) / 500, 1.0)
+    
+    # Technical terms (each counted once)
+    tech_hits = len(set(TECHNICAL_TERMS_RE.findall(query.lower())))
+    tech_score = tech_hits / len(TECHNICAL_TERMS)
+    
+    # Question complexity (multi-part questions)
+    question_marks = query.count("?")
+    multi_part_score = min(question_marks / 3, 1.0)
+    
+    # Weighted average
+    complexity = (
+        0.3 * length_score +
+        0.5 * tech_score +
+        0.2 * multi_part_score
+    )
+    
+    return complexity
+
 
 class ModelProvider(str, Enum):
     """LLM providers"""
@@ -41,7 +82,7 @@ class ModelRouter:
         self.privacy_mode = privacy_mode
         
         # Initialize clients
-        self.openai_client = AsyncOpenAI(api_key=settings.llm.openai_api_key)
+        self.openai_client = AsyncOpenAI(api_key=settings.llm.openai_api_key, http_client=get_http_client())
         self.ollama_client = OllamaClient(base_url=ollama_base_url)
         self.localai_client = LocalAIClient(base_url=localai_base_url)
         
@@ -51,15 +92,56 @@ class ModelRouter:
             ModelProvider.OLLAMA: False,
             ModelProvider.LOCALAI: False
         }
+        # When each local provider was last probed, and a lock so concurrent
+        # callers share one probe instead of each sending their own
+        self._health_checks = {
+            ModelProvider.OLLAMA: self.ollama_client.health_check,
+            ModelProvider.LOCALAI: self.localai_client.health_check
+        }
+        self._health_ts = {provider: 0.0 for provider in self._health_checks}
+        self._health_locks = {provider: asyncio.Lock() for provider in self._health_checks}
+        self._health_task: Optional[asyncio.Task] = None
         
-        logger.info(f"Initialized ModelRouter: default={default_provider}, privacy_mode={privacy_mode}")
+        logger.info("Initialized ModelRouter: default=%s, privacy_mode=%s", default_provider, privacy_mode)
     
     async def initialize(self):
-        """Check health of all providers"""
-        self._provider_health[ModelProvider.OLLAMA] = await self.ollama_client.health_check()
-        self._provider_health[ModelProvider.LOCALAI] = await self.localai_client.health_check()
+        """Check health of all providers and keep it fresh in the background."""
+        await self._refresh_health()
+        logger.info("Provider health: %s", self._provider_health)
         
-        logger.info(f"Provider health: {self._provider_health}")
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_refresh_loop())
+    
+    async def close(self):
+        """Stop the background health refresh."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+    
+    async def _ensure_fresh(self, provider: ModelProvider, ttl: float = HEALTH_TTL) -> bool:
+        """Re-probe a provider if its health is older than `ttl` seconds."""
+        async with self._health_locks[provider]:
+            # Another caller may have refreshed it while we waited for the lock
+            if time.monotonic() - self._health_ts[provider] > ttl:
+                self._provider_health[provider] = await self._health_checks[provider]()
+                self._health_ts[provider] = time.monotonic()
+        return self._provider_health[provider]
+    
+    async def _refresh_health(self, ttl: float = 0.0):
+        await asyncio.gather(*(self._ensure_fresh(provider, ttl) for provider in self._health_checks))
+    
+    async def _health_refresh_loop(self):
+        """Probe local providers every HEALTH_TTL seconds so select_provider never sees stale state."""
+        while True:
+            await asyncio.sleep(HEALTH_TTL)
+            try:
+                await self._refresh_health(ttl=HEALTH_TTL / 2)
+            except Exception as e:
+                logger.warning("Provider health refresh failed: %s", e)
     
     def select_provider(
         self,
@@ -82,7 +164,7 @@ class ModelRouter:
         if force_provider:
             if self._provider_health.get(force_provider, False):
                 return force_provider
-            logger.warning(f"Forced provider {force_provider} not available, falling back")
+            logger.warning("Forced provider %s not available, falling back", force_provider)
         
         # Privacy mode: prefer local models
         privacy_mode = privacy_required if privacy_required is not None else self.privacy_mode
@@ -99,17 +181,22 @@ class ModelRouter:
                 logger.warning("Privacy mode enabled but no local providers available, using OpenAI")
                 return ModelProvider.OPENAI
         
+        # Complexity only decides between OpenAI and Ollama; without a healthy
+        # Ollama every branch below returns OpenAI or the default, so skip it
+        if not self._provider_health[ModelProvider.OLLAMA] and self.default_provider == ModelProvider.OPENAI:
+            return ModelProvider.OPENAI
+        
         # Analyze query complexity
         complexity = self._estimate_complexity(query)
         
         # For complex queries, prefer cloud models
         if complexity > 0.7:
-            logger.info(f"High complexity query ({complexity:.2f}), using OpenAI")
+            logger.info("High complexity query (%.2f), using OpenAI", complexity)
             return ModelProvider.OPENAI
         
         # For simple queries, use local if available
         if self._provider_health[ModelProvider.OLLAMA]:
-            logger.info(f"Low complexity query ({complexity:.2f}), using Ollama")
+            logger.info("Low complexity query (%.2f), using Ollama", complexity)
             return ModelProvider.OLLAMA
         
         # Default fallback
@@ -124,29 +211,7 @@ class ModelRouter:
         - Presence of technical terms
         - Question complexity
         """
-        # Length factor
-        length_score = min(len(query) / 500, 1.0)
-        
-        # Technical terms
-        technical_terms = [
-            "algorithm", "implementation", "architecture", "optimization",
-            "performance", "scalability", "distributed", "machine learning",
-            "neural network", "deep learning", "database", "query"
-        ]
-        tech_score = sum(1 for term in technical_terms if term in query.lower()) / len(technical_terms)
-        
-        # Question complexity (multi-part questions)
-        question_marks = query.count("?")
-        multi_part_score = min(question_marks / 3, 1.0)
-        
-        # Weighted average
-        complexity = (
-            0.3 * length_score +
-            0.5 * tech_score +
-            0.2 * multi_part_score
-        )
-        
-        return complexity
+        return _estimate_complexity(query)
     
     async def generate(
         self,
@@ -184,7 +249,7 @@ class ModelRouter:
                 raise ValueError(f"Unknown provider: {selected_provider}")
                 
         except Exception as e:
-            logger.error(f"Generation failed with {selected_provider}: {e}")
+            logger.error("Generation failed with %s: %s", selected_provider, e)
             
             # Fallback to OpenAI if local provider fails
             if selected_provider != ModelProvider.OPENAI:
@@ -223,6 +288,7 @@ class ModelRouter:
         temperature: float = 0.0,
         max_tokens: Optional[int] = None,
         provider: Optional[ModelProvider] = None,
+        coalesce_chunks: bool = False,
         **kwargs
     ) -> AsyncGenerator[str, None]:
         """
@@ -234,6 +300,8 @@ class ModelRouter:
             temperature: Sampling temperature
             max_tokens: Maximum tokens
             provider: Force specific provider
+            coalesce_chunks: Merge token deltas into larger chunks (see streaming.coalesce)
+                for consumers that do per-chunk work such as network writes
             **kwargs: Additional parameters
         
         Yields:
@@ -243,17 +311,21 @@ class ModelRouter:
         
         try:
             if selected_provider == ModelProvider.OPENAI:
-                async for chunk in self._generate_stream_openai(prompt, system, temperature, max_tokens, **kwargs):
-                    yield chunk
+                stream = self._generate_stream_openai(prompt, system, temperature, max_tokens, **kwargs)
             elif selected_provider == ModelProvider.OLLAMA:
-                async for chunk in self.ollama_client.generate_stream(prompt, system=system, temperature=temperature, max_tokens=max_tokens, **kwargs):
-                    yield chunk
+                stream = self.ollama_client.generate_stream(prompt, system=system, temperature=temperature, max_tokens=max_tokens, **kwargs)
             elif selected_provider == ModelProvider.LOCALAI:
-                async for chunk in self.localai_client.generate_stream(prompt, system=system, temperature=temperature, max_tokens=max_tokens, **kwargs):
-                    yield chunk
+                stream = self.localai_client.generate_stream(prompt, system=system, temperature=temperature, max_tokens=max_tokens, **kwargs)
+            else:
+                raise ValueError(f"Unknown provider: {selected_provider}")
+            
+            if coalesce_chunks:
+                stream = coalesce(stream)
+            async for chunk in stream:
+                yield chunk
                     
         except Exception as e:
-            logger.error(f"Streaming failed with {selected_provider}: {e}")
+            logger.error("Streaming failed with %s: %s", selected_provider, e)
             raise
     
     async def _generate_stream_openai(
@@ -4,12 +4,27 @@ Supports Llama 3, Phi-3, Mistral, and other models.
 """
 
 import logging
-from typing import Optional, AsyncGenerator, Dict, Any
+from typing import Optional, AsyncGenerator, Dict, Any, Tuple
 import httpx
+import orjson
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from .prompt_optimizer import ModelType, PromptOptimizer
+
 logger = logging.getLogger(__name__)
 
+# Shared connection pools, one per (base_url, timeout)
+_CLIENTS: Dict[Tuple[str, int], httpx.AsyncClient] = {}
+
+# Read size for streamed NDJSON responses
+STREAM_CHUNK_SIZE = 65536
+
+# Request bodies are encoded with orjson rather than httpx's stdlib json
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Keep models (and their KV cache) loaded between requests
+KEEP_ALIVE = "30m"
+
 
 class OllamaClient:
     """
@@ -25,15 +40,43 @@ class OllamaClient:
         self.base_url = base_url.rstrip("/")
         self.model = model
         self.timeout = timeout
-        self.client = httpx.AsyncClient(timeout=timeout)
+        self.client = self._get_client(self.base_url, timeout)
         
         logger.info(f"Initialized Ollama client: {self.base_url}, model={self.model}")
     
+    @classmethod
+    def _get_client(cls, base_url: str, timeout: int) -> httpx.AsyncClient:
+        """
+        Return the shared HTTP client for a server.
+        
+        Instances are created per request handler and router, so pooling here
+        keeps keep-alive connections open across them instead of reconnecting.
+        """
+        key = (base_url, timeout)
+        client = _CLIENTS.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=True,
+                timeout=timeout,
+                limits=httpx.Limits(max_keepalive_connections=64, max_connections=256)
+            )
+            _CLIENTS[key] = client
+        return client
+    
+    @classmethod
+    async def shutdown(cls):
+        """Close all shared HTTP clients (call once on application shutdown)."""
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+        for client in clients:
+            await client.aclose()
+    
     async def __aenter__(self):
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.client.aclose()
+        # The connection pool is shared; see shutdown()
+        pass
     
     @retry(
         stop=stop_after_attempt(3),
@@ -65,34 +108,17 @@ class OllamaClient:
         Returns:
             Generated text
         """
-        model_name = model or self.model
-        
-        payload = {
-            "model": model_name,
-            "prompt": prompt,
-            "stream": stream,
-            "options": {
-                "temperature": temperature,
-            }
-        }
-        
-        if system:
-            payload["system"] = system
-        
-        if max_tokens:
-            payload["options"]["num_predict"] = max_tokens
-        
-        # Add any additional options
-        payload["options"].update(kwargs)
+        payload = self._generate_payload(prompt, model, system, temperature, max_tokens, stream, kwargs)
         
         try:
             response = await self.client.post(
                 f"{self.base_url}/api/generate",
-                json=payload
+                content=orjson.dumps(payload),
+                headers=JSON_HEADERS
             )
             response.raise_for_status()
             
-            result = response.json()
+            result = orjson.loads(response.content)
             return result.get("response", "")
             
         except httpx.HTTPError as e:
@@ -122,46 +148,95 @@ class OllamaClient:
         Yields:
             Generated text chunks
         """
+        payload = self._generate_payload(prompt, model, system, temperature, max_tokens, True, kwargs)
+        
+        try:
+            async with self.client.stream(
+                "POST",
+                f"{self.base_url}/api/generate",
+                content=orjson.dumps(payload),
+                headers=JSON_HEADERS
+            ) as response:
+                response.raise_for_status()
+                
+                async for data in self._iter_ndjson(response):
+                    if "response" in data:
+                        yield data["response"]
+                    
+                    if data.get("done", False):
+                        break
+                            
+        except httpx.HTTPError as e:
+            logger.error(f"Ollama streaming failed: {e}")
+            raise
+    
+    def _generate_payload(
+        self,
+        prompt: str,
+        model: Optional[str],
+        system: Optional[str],
+        temperature: float,
+        max_tokens: Optional[int],
+        stream: bool,
+        options: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Build an /api/generate request body.
+        
+        For known model families the prompt is sent pre-templated (raw mode)
+        with a cached, byte-stable prefix, and num_keep pins the prefix tokens
+        so Ollama can reuse their KV state across requests sharing a system
+        prompt. Unknown models fall back to Ollama's own template.
+        """
         model_name = model or self.model
         
         payload = {
             "model": model_name,
             "prompt": prompt,
-            "stream": True,
+            "stream": stream,
+            "keep_alive": KEEP_ALIVE,
             "options": {
                 "temperature": temperature,
             }
         }
         
         if system:
-            payload["system"] = system
+            if PromptOptimizer.detect_model_type(model_name) == ModelType.GENERIC:
+                payload["system"] = system
+            else:
+                prefix, suffix = PromptOptimizer.build(model_name, system, prompt)
+                payload["prompt"] = prefix + suffix
+                payload["raw"] = True
+                payload["options"]["num_keep"] = PromptOptimizer.estimate_tokens(prefix)
         
         if max_tokens:
             payload["options"]["num_predict"] = max_tokens
         
-        payload["options"].update(kwargs)
+        # Add any additional options
+        payload["options"].update(options)
+        return payload
+    
+    @staticmethod
+    async def _iter_ndjson(response: httpx.Response) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Parse a newline-delimited JSON stream.
         
-        try:
-            async with self.client.stream(
-                "POST",
-                f"{self.base_url}/api/generate",
-                json=payload
-            ) as response:
-                response.raise_for_status()
-                
-                async for line in response.aiter_lines():
-                    if line:
-                        import json
-                        data = json.loads(line)
-                        if "response" in data:
-                            yield data["response"]
-                        
-                        if data.get("done", False):
-                            break
-                            
-        except httpx.HTTPError as e:
-            logger.error(f"Ollama streaming failed: {e}")
-            raise
+        Raw chunks are split on newlines in one buffer and each frame goes
+        straight to orjson, skipping aiter_lines' per-line decoding.
+        """
+        buffer = bytearray()
+        async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+            buffer.extend(chunk)
+            start = 0
+            while (end := buffer.find(b"\n", start)) != -1:
+                if end > start:
+                    yield orjson.loads(memoryview(buffer)[start:end])
+                start = end + 1
+            del buffer[:start]
+        
+        # Final frame without a trailing newline
+        if buffer.strip():
+            yield orjson.loads(buffer)
     
     async def chat(
         self,
@@ -190,6 +265,7 @@ class OllamaClient:
             "model": model_name,
             "messages": messages,
             "stream": False,
+            "keep_alive": KEEP_ALIVE,
             "options": {
                 "temperature": temperature,
             }
@@ -203,11 +279,12 @@ class OllamaClient:
         try:
             response = await self.client.post(
                 f"{self.base_url}/api/chat",
-                json=payload
+                content=orjson.dumps(payload),
+                headers=JSON_HEADERS
             )
             response.raise_for_status()
             
-            result = response.json()
+            result = orjson.loads(response.content)
             return result.get("message", {}).get("content", "")
             
         except httpx.HTTPError as e:
@@ -225,7 +302,7 @@ class OllamaClient:
             response = await self.client.get(f"{self.base_url}/api/tags")
             response.raise_for_status()
             
-            result = response.json()
+            result = orjson.loads(response.content)
             models = result.get("models", [])
             return [model["name"] for model in models]
             
@@ -246,7 +323,8 @@ class OllamaClient:
         try:
             response = await self.client.post(
                 f"{self.base_url}/api/pull",
-                json={"name": model}
+                content=orjson.dumps({"name": model}),
+                headers=JSON_HEADERS
             )
             response.raise_for_status()
             logger.info(f"Successfully pulled model: {model}")
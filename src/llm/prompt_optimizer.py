@@ -4,11 +4,17 @@ Provides model-specific templates and context compression.
 """
 
 import logging
-from typing import Optional, Dict, List
+import re
+import sys
+from functools import lru_cache
+from typing import Optional, Dict, List, Tuple
 from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+# Rough characters-per-token ratio for English text with SLM tokenizers
+CHARS_PER_TOKEN = 4
+
 
 class ModelType(str, Enum):
     """Supported model types"""
@@ -37,4 +43,129 @@ class PromptOptimizer:
         ModelType.PHI3: {
             "system_start": "<|system|>\n",
             "system_end": "<|end|>\n",
-            "user_start": "
\ No newline at end of file
+            "user_start": "<|user|>\n",
+            "user_end": "<|end|>\n",
+            "assistant_start": "<|assistant|>\n",
+            "assistant_end": "<|end|>\n",
+        },
+        # Mistral and Gemma have no system role; the system text opens the first user turn
+        ModelType.MISTRAL: {
+            "user_start": "[INST] ",
+            "user_end": " [/INST]",
+            "assistant_start": "",
+            "assistant_end": "</s>",
+        },
+        ModelType.GEMMA: {
+            "user_start": "<start_of_turn>user\n",
+            "user_end": "<end_of_turn>\n",
+            "assistant_start": "<start_of_turn>model\n",
+            "assistant_end": "<end_of_turn>\n",
+        },
+        ModelType.GENERIC: {
+            "system_start": "### System:\n",
+            "system_end": "\n\n",
+            "user_start": "### User:\n",
+            "user_end": "\n\n",
+            "assistant_start": "### Assistant:\n",
+            "assistant_end": "\n\n",
+        },
+    }
+    
+    @staticmethod
+    def detect_model_type(model: str) -> ModelType:
+        """
+        Map an Ollama model name (e.g. "llama3.1:8b", "phi3:mini") to its template family.
+        
+        Args:
+            model: Model name
+        
+        Returns:
+            Matching ModelType, GENERIC when unknown
+        """
+        name = model.split(":")[0].lower()
+        for model_type in (ModelType.LLAMA3, ModelType.PHI3, ModelType.MISTRAL, ModelType.GEMMA):
+            if name.startswith(model_type.value):
+                return model_type
+        return ModelType.GENERIC
+    
+    @classmethod
+    def build(cls, model: str, system: Optional[str], user: str) -> Tuple[str, str]:
+        """
+        Split a formatted prompt into a cacheable prefix and a per-request suffix.
+        
+        The prefix covers everything up to the user's text and depends only on
+        the model and system prompt, so requests sharing a system prompt send
+        byte-identical prefixes and the server can reuse their KV cache.
+        
+        Args:
+            model: Model name
+            system: System message
+            user: User message
+        
+        Returns:
+            Tuple of (prefix, suffix)
+        """
+        model_type = cls.detect_model_type(model)
+        template = cls.TEMPLATES[model_type]
+        suffix = user + template["user_end"] + template["assistant_start"]
+        return _prefix(model_type, system or ""), suffix
+    
+    @classmethod
+    def format_prompt(cls, model: str, user: str, system: Optional[str] = None) -> str:
+        """Format a single-turn prompt in the model's chat template."""
+        prefix, suffix = cls.build(model, system, user)
+        return prefix + suffix
+    
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Approximate token count without loading a tokenizer."""
+        return len(text) // CHARS_PER_TOKEN
+    
+    @classmethod
+    def compress_context(cls, context: str, max_tokens: int) -> str:
+        """
+        Shrink retrieved context to fit a small model's window.
+        
+        Collapses whitespace, drops repeated paragraphs, then truncates at the
+        last sentence boundary within the budget.
+        
+        Args:
+            context: Context text
+            max_tokens: Token budget
+        
+        Returns:
+            Compressed context
+        """
+        paragraphs: List[str] = []
+        seen = set()
+        for paragraph in re.split(r"\n\s*\n", context):
+            paragraph = " ".join(paragraph.split())
+            if paragraph and paragraph not in seen:
+                seen.add(paragraph)
+                paragraphs.append(paragraph)
+        
+        compressed = "\n\n".join(paragraphs)
+        max_chars = max_tokens * CHARS_PER_TOKEN
+        if len(compressed) <= max_chars:
+            return compressed
+        
+        truncated = compressed[:max_chars]
+        boundary = truncated.rfind(". ")
+        if boundary > max_chars // 2:
+            truncated = truncated[:boundary + 1]
+        
+        logger.debug(f"Compressed context from {len(context)} to {len(truncated)} chars")
+        return truncated
+
+
+@lru_cache(maxsize=1024)
+def _prefix(model_type: ModelType, system: str) -> str:
+    """Assemble (and intern) the prompt prefix for a model family and system prompt."""
+    template = PromptOptimizer.TEMPLATES[model_type]
+    if "system_start" in template:
+        prefix = template["user_start"]
+        if system:
+            prefix = template["system_start"] + system + template["system_end"] + prefix
+    else:
+        prefix = template["user_start"] + (system + "\n\n" if system else "")
+    return sys.intern(prefix)
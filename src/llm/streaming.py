@@ -0,0 +1,38 @@
+"""
+Helpers for token streams from LLM providers.
+"""
+
+import time
+from typing import AsyncGenerator, AsyncIterator
+
+
+async def coalesce(
+    stream: AsyncIterator[str],
+    max_chars: int = 4096,
+    max_delay: float = 0.05
+) -> AsyncGenerator[str, None]:
+    """
+    Merge a token stream into fewer, larger chunks.
+    
+    Buffered deltas are joined and yielded once they reach `max_chars` or the
+    oldest has waited `max_delay` seconds. The age is checked as each delta
+    arrives, so a flush can trail the deadline by one inter-token gap; the
+    remainder is yielded when the stream ends.
+    """
+    parts = []
+    size = 0
+    started = 0.0
+    
+    async for delta in stream:
+        if not parts:
+            started = time.monotonic()
+        parts.append(delta)
+        size += len(delta)
+        
+        if size >= max_chars or time.monotonic() - started >= max_delay:
+            yield "".join(parts)
+            parts.clear()
+            size = 0
+    
+    if parts:
+        yield "".join(parts)
@@ -3,14 +3,19 @@ PII (Personally Identifiable Information) detection and masking.
 Uses regex patterns and NER models for comprehensive PII detection.
 """
 
+import asyncio
+import hashlib
 import logging
 import re
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, List, Dict, Optional, Tuple
 from enum import Enum
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+# Combined query + response size above which async masking runs in a worker thread
+OFFLOAD_THRESHOLD = 64 * 1024
+
 
 class PIIType(str, Enum):
     """Types of PII"""
@@ -60,6 +65,15 @@ class PIIMasker:
         PIIType.URL: r'https?://(?:www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b(?:[-a-zA-Z0-9()@:%_\+.~#?&/=]*)',
     }
     
+    # Per-type compiled patterns, for callers matching a single PII type
+    COMPILED_PATTERNS = {pii_type: re.compile(pattern) for pii_type, pattern in PATTERNS.items()}
+    
+    # All patterns as one alternation, so detection walks the text once.
+    # Earlier entries in PATTERNS win when several types match at a position.
+    _COMBINED_PATTERN = re.compile(
+        "|".join(f"(?P<{pii_type.name}>{pattern})" for pii_type, pattern in PATTERNS.items())
+    )
+    
     # Default replacements
     REPLACEMENTS = {
         PIIType.EMAIL: "[EMAIL]",
@@ -92,6 +106,11 @@ class PIIMasker:
         self.sensitivity = sensitivity
         self.ner_model = None
         
+        # Known literal PII (seed lists), matched before the regex patterns
+        self._literal_types: Dict[str, PIIType] = {}
+        self._literal_automaton = None
+        self._literal_pattern = None
+        
         if use_ner:
             self._init_ner_model()
         
@@ -110,29 +129,107 @@ class PIIMasker:
             logger.warning("spaCy not installed. Install with: pip install spacy")
             self.ner_model = None
     
-    def detect_pii(self, text: str) -> List[PIIEntity]:
+    def add_literals(self, literals: Iterable[str], pii_type: PIIType = PIIType.CUSTOM):
         """
-        Detect PII in text.
+        Register known PII values (employee names, customer IDs, hostnames).
         
-        Args:
-            text: Input text
+        Literals are matched as whole words with an Aho-Corasick automaton
+        when pyahocorasick is installed, so scan time does not grow with the
+        size of the seed list; otherwise a regex alternation is used.
         
-        Returns:
-            List of detected PII entities
+        Args:
+            literals: Exact strings to detect
+            pii_type: Type reported for these literals
         """
+        for literal in literals:
+            if literal:
+                self._literal_types[literal] = pii_type
+        
+        try:
+            import ahocorasick
+        except ImportError:
+            ahocorasick = None
+        
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for literal, literal_type in self._literal_types.items():
+                automaton.add_word(literal, (literal_type, literal))
+            automaton.make_automaton()
+            self._literal_automaton = automaton
+        else:
+            # Longest first so overlapping literals match whole
+            alternation = "|".join(
+                re.escape(literal) for literal in sorted(self._literal_types, key=len, reverse=True)
+            )
+            self._literal_pattern = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)")
+        
+        logger.info(f"Registered {len(self._literal_types)} PII literals")
+    
+    def _detect_literals(self, text: str) -> List[PIIEntity]:
+        """Detect registered literal PII values"""
         entities = []
         
-        # Regex-based detection
-        for pii_type, pattern in self.PATTERNS.items():
-            for match in re.finditer(pattern, text):
+        if self._literal_automaton is not None:
+            # Longest whole-word match per start position
+            longest: Dict[int, Tuple[PIIType, str]] = {}
+            for end, (pii_type, literal) in self._literal_automaton.iter(text):
+                start = end - len(literal) + 1
+                if not self._is_word_bounded(text, start, end + 1):
+                    continue
+                if start not in longest or len(literal) > len(longest[start][1]):
+                    longest[start] = (pii_type, literal)
+            
+            for start, (pii_type, literal) in longest.items():
                 entities.append(PIIEntity(
                     type=pii_type,
+                    text=literal,
+                    start=start,
+                    end=start + len(literal),
+                    confidence=1.0
+                ))
+        
+        elif self._literal_pattern is not None:
+            for match in self._literal_pattern.finditer(text):
+                entities.append(PIIEntity(
+                    type=self._literal_types[match.group()],
                     text=match.group(),
                     start=match.start(),
                     end=match.end(),
                     confidence=1.0
                 ))
         
+        return entities
+    
+    @staticmethod
+    def _is_word_bounded(text: str, start: int, end: int) -> bool:
+        """Check a span is not part of a longer word"""
+        before = text[start - 1] if start > 0 else " "
+        after = text[end] if end < len(text) else " "
+        return not (before.isalnum() or before == "_") and not (after.isalnum() or after == "_")
+    
+    def detect_pii(self, text: str) -> List[PIIEntity]:
+        """
+        Detect PII in text.
+        
+        Args:
+            text: Input text
+        
+        Returns:
+            List of detected PII entities
+        """
+        # Known literals first, so they win ties with regex matches
+        entities = self._detect_literals(text)
+        
+        # Regex-based detection, single pass over all patterns
+        for match in self._COMBINED_PATTERN.finditer(text):
+            entities.append(PIIEntity(
+                type=PIIType[match.lastgroup],
+                text=match.group(),
+                start=match.start(),
+                end=match.end(),
+                confidence=1.0
+            ))
+        
         # NER-based detection for person names
         if self.use_ner and self.ner_model:
             ner_entities = self._detect_with_ner(text)
@@ -226,24 +323,21 @@ class PIIMasker:
         if not entities:
             return text, []
         
-        # Apply masking strategy
-        masked_text = text
-        offset = 0
+        # Apply masking strategy, copying the unmasked gaps between spans once
+        parts = []
+        cursor = 0
         
         for entity in entities:
             replacement = self._get_replacement(entity)
             entity.replacement = replacement
             
-            # Adjust positions based on previous replacements
-            start = entity.start + offset
-            end = entity.end + offset
-            
-            masked_text = masked_text[:start] + replacement + masked_text[end:]
-            
-            # Update offset
-            offset += len(replacement) - (entity.end - entity.start)
+            parts.append(text[cursor:entity.start])
+            parts.append(replacement)
+            cursor = entity.end
+        
+        parts.append(text[cursor:])
         
-        return masked_text, entities
+        return "".join(parts), entities
     
     def _get_replacement(self, entity: PIIEntity) -> str:
         """Get replacement text based on strategy"""
@@ -254,8 +348,8 @@ class PIIMasker:
             return "[REDACTED]"
         
         elif self.strategy == MaskingStrategy.HASH:
-            import hashlib
-            hash_value = hashlib.md5(entity.text.encode()).hexdigest()[:8]
+            # blake2b is faster than md5 and still available on FIPS builds
+            hash_value = hashlib.blake2b(entity.text.encode(), digest_size=4).hexdigest()
             return f"[{entity.type.value.upper()}_{hash_value}]"
         
         elif self.strategy == MaskingStrategy.PARTIAL:
@@ -317,18 +411,44 @@ class PIIMasker:
         # For response, we need to be careful not to mask legitimate content
         # Only mask if the same PII appears in the response
         response_entities = []
-        for entity in query_entities:
-            if entity.text in response:
-                # Find all occurrences in response
-                for match in re.finditer(re.escape(entity.text), response):
-                    response_entities.append(PIIEntity(
-                        type=entity.type,
-                        text=entity.text,
-                        start=match.start(),
-                        end=match.end(),
-                        confidence=entity.confidence
-                    ))
+        if query_entities:
+            by_text = {entity.text: entity for entity in query_entities}
+            # Longest first so a value containing another is matched whole
+            pattern = re.compile("|".join(
+                re.escape(value) for value in sorted(by_text, key=len, reverse=True)
+            ))
+            for match in pattern.finditer(response):
+                entity = by_text[match.group()]
+                response_entities.append(PIIEntity(
+                    type=entity.type,
+                    text=entity.text,
+                    start=match.start(),
+                    end=match.end(),
+                    confidence=entity.confidence
+                ))
         
         masked_response, _ = self.mask_text(response, response_entities)
         
         return masked_query, masked_response, query_entities
+    
+    async def amask_query_response(
+        self,
+        query: str,
+        response: str
+    ) -> Tuple[str, str, List[PIIEntity]]:
+        """
+        Async variant of mask_query_response.
+        
+        Large inputs are masked in a worker thread so the regex scans do not
+        stall the event loop; small ones are cheaper to mask inline.
+        
+        Args:
+            query: User query
+            response: LLM response
+        
+        Returns:
+            Tuple of (masked_query, masked_response, entities)
+        """
+        if len(query) + len(response) < OFFLOAD_THRESHOLD:
+            return self.mask_query_response(query, response)
+        return await asyncio.to_thread(self.mask_query_response, query, response)
@@ -4,13 +4,19 @@ Handles keyword matching with custom analyzers.
 """
 
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 from elasticsearch import AsyncElasticsearch, helpers
+from elasticsearch.serializer import OrjsonSerializer
 
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Bulk requests are flushed at whichever limit is hit first
+BULK_CHUNK_SIZE = 1000
+BULK_MAX_CHUNK_BYTES = 10 * 1024 * 1024
+BULK_REQUEST_TIMEOUT = 60
+
 class ElasticsearchClient:
     """
     Client for Elasticsearch lexical search.
@@ -24,7 +30,8 @@ class ElasticsearchClient:
         if not self.mock_mode:
             self.client = AsyncElasticsearch(
                 hosts=[f"http://{settings.elasticsearch.elasticsearch_host}:{settings.elasticsearch.elasticsearch_port}"],
-                basic_auth=(settings.elasticsearch.elasticsearch_user, settings.elasticsearch.elasticsearch_password)
+                basic_auth=(settings.elasticsearch.elasticsearch_user, settings.elasticsearch.elasticsearch_password),
+                serializer=OrjsonSerializer()
             )
         else:
             logger.info("ElasticsearchClient initialized in MOCK MODE")
@@ -79,9 +86,22 @@ class ElasticsearchClient:
             logger.info(f"[MOCK] Indexed {len(chunks)} documents in Elasticsearch mock storage")
             return
 
-        actions = []
+        indexed = 0
+        async for ok, _ in helpers.async_streaming_bulk(
+            self.client.options(request_timeout=BULK_REQUEST_TIMEOUT),
+            self._bulk_actions(chunks),
+            chunk_size=BULK_CHUNK_SIZE,
+            max_chunk_bytes=BULK_MAX_CHUNK_BYTES,
+            max_retries=3,
+            initial_backoff=1
+        ):
+            indexed += ok
+        logger.info(f"Indexed {indexed} documents in Elasticsearch")
+
+    def _bulk_actions(self, chunks: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield bulk actions lazily so only the batch in flight is held in memory."""
         for chunk in chunks:
-            action = {
+            yield {
                 "_index": self.index_name,
                 "_id": chunk["id"],
                 "_source": {
@@ -91,10 +111,6 @@ class ElasticsearchClient:
                     "chunk_id": chunk["id"]
                 }
             }
-            actions.append(action)
-            
-        await helpers.async_bulk(self.client, actions)
-        logger.info(f"Indexed {len(chunks)} documents in Elasticsearch")
 
     async def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -5,12 +5,13 @@ Orchestrates Milvus and Elasticsearch with RRF.
 
 import logging
 import asyncio
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from src.search.milvus_client import MilvusClient
 from src.search.elasticsearch_client import ElasticsearchClient
 from src.search.rrf_fusion import RRFFusion
 from langchain_openai import OpenAIEmbeddings
+from src.cache.embedding_cache import EmbeddingCache
 
 from config.settings import settings
 
@@ -33,6 +34,7 @@ class HybridSearchEngine:
             model=settings.llm.embedding_model,
             api_key=settings.llm.openai_api_key
         )
+        self.embedding_cache = EmbeddingCache(self.embeddings)
         self.query_expander = QueryExpander()
         self.graph_retriever = GraphRetriever()
         
@@ -50,7 +52,7 @@ class HybridSearchEngine:
             formatted_chunks.append({
                 "id": chunk.chunk_id,
                 "content": chunk.content,
-                "embedding": chunk.embedding,
+                "embedding": chunk.embedding_f32,
                 "metadata": chunk.metadata,
                 "parent_id": chunk.parent_id
             })
@@ -62,12 +64,17 @@ class HybridSearchEngine:
         )
         logger.info(f"Indexed {len(chunks)} chunks in hybrid engine")
 
-    async def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    async def embed_query(self, query: str) -> List[float]:
+        """Embed a query, reusing the cached vector for repeat queries."""
+        return await self.embedding_cache.embed(query)
+
+    async def search(self, query: str, limit: int = 10, query_vector: Optional[List[float]] = None) -> List[Dict[str, Any]]:
         """
         Perform hybrid search with query expansion and graph retrieval.
         """
         # 1. Generate embedding for original query (Dense Search)
-        query_vector = await self.embeddings.aembed_query(query)
+        if query_vector is None:
+            query_vector = await self.embed_query(query)
         
         # 2. Expand query for Lexical Search
         expanded_terms = await self.query_expander.expand_query(query)
@@ -3,7 +3,7 @@ Pydantic models for voice processing.
 """
 
 from typing import Optional, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
 
 
@@ -84,6 +84,8 @@ class VoiceSessionState(BaseModel):
     config: VoiceConfig = Field(default_factory=VoiceConfig)
     is_recording: bool = Field(default=False, description="Whether currently recording")
     is_speaking: bool = Field(default=False, description="Whether currently speaking")
-    buffer: list[bytes] = Field(default_factory=list, description="Audio buffer")
+    buffer: bytearray = Field(default_factory=bytearray, description="Audio buffer, extended in place")
     created_at: float = Field(..., description="Session creation timestamp")
     last_activity: float = Field(..., description="Last activity timestamp")
+    
+    model_config = ConfigDict(arbitrary_types_allowed=True)
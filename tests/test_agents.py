@@ -7,9 +7,18 @@ from unittest.mock import Mock, patch, AsyncMock
 from src.agents.router_agent import RouterAgent
 from src.agents.retrieval_grader import RetrievalGrader
 from src.agents.langgraph_workflow import RAGWorkflow
+from src.agents.llm_cache import close_http_client, get_http_client, get_llm, get_structured_llm
+
+@pytest.fixture(autouse=True)
+def clear_llm_cache():
+    get_llm.cache_clear()
+    get_structured_llm.cache_clear()
+    yield
+    get_llm.cache_clear()
+    get_structured_llm.cache_clear()
 
 def test_router_agent():
-    with patch("src.agents.router_agent.ChatOpenAI") as mock_llm:
+    with patch("src.agents.llm_cache.ChatOpenAI") as mock_llm:
         # Create a mock result object
         mock_result = Mock()
         mock_result.datasource = "vectorstore"
@@ -20,7 +29,7 @@ def test_router_agent():
         assert result == "vectorstore"
 
 def test_retrieval_grader():
-    with patch("src.agents.retrieval_grader.ChatOpenAI") as mock_llm:
+    with patch("src.agents.llm_cache.ChatOpenAI") as mock_llm:
         # Create a mock result object
         mock_result = Mock()
         mock_result.binary_score = "yes"
@@ -30,16 +39,156 @@ def test_retrieval_grader():
         result = agent.grade("question", "document content")
         assert result == "yes"
 
+def test_llm_cache_shares_client():
+    with patch("src.agents.llm_cache.ChatOpenAI") as mock_llm:
+        RouterAgent()
+        RetrievalGrader()
+        
+        # Both agents should reuse a single client
+        assert mock_llm.call_count == 1
+
+@pytest.mark.asyncio
+async def test_close_http_client_resets_shared_client():
+    client = get_http_client()
+    
+    await close_http_client()
+    
+    assert client.is_closed
+    assert get_http_client() is not client
+    await close_http_client()
+
 @pytest.mark.asyncio
 async def test_rag_workflow():
     with patch("src.agents.langgraph_workflow.RouterAgent"), \
          patch("src.agents.langgraph_workflow.RetrievalGrader"), \
          patch("src.agents.langgraph_workflow.HallucinationGrader"), \
          patch("src.agents.langgraph_workflow.HybridSearchEngine") as mock_engine, \
-         patch("src.agents.langgraph_workflow.ChatOpenAI"):
+         patch("src.agents.llm_cache.ChatOpenAI"):
              
         # Mock search engine
         mock_engine.return_value.search = AsyncMock(return_value=[{"content": "test doc"}])
         
         workflow = RAGWorkflow()
         assert workflow.app is not None
+
+@pytest.mark.asyncio
+async def test_grade_generation_runs_checks_concurrently():
+    with patch("src.agents.langgraph_workflow.RouterAgent"), \
+         patch("src.agents.langgraph_workflow.RetrievalGrader"), \
+         patch("src.agents.langgraph_workflow.HallucinationGrader") as mock_grader, \
+         patch("src.agents.langgraph_workflow.HybridSearchEngine"), \
+         patch("src.agents.llm_cache.ChatOpenAI"):
+        
+        grader = mock_grader.return_value
+        grader.acheck_hallucination = AsyncMock(return_value="yes")
+        grader.acheck_answer = AsyncMock(return_value="no")
+        
+        workflow = RAGWorkflow()
+        decision = await workflow.grade_generation_v_documents_and_question(
+            {"question": "q", "documents": ["doc"], "generation": "answer"}
+        )
+        
+        assert decision == "not useful"
+        grader.acheck_hallucination.assert_awaited_once()
+        grader.acheck_answer.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_grade_documents_filters_concurrently():
+    with patch("src.agents.langgraph_workflow.RouterAgent"), \
+         patch("src.agents.langgraph_workflow.RetrievalGrader") as mock_grader, \
+         patch("src.agents.langgraph_workflow.HallucinationGrader"), \
+         patch("src.agents.langgraph_workflow.HybridSearchEngine"), \
+         patch("src.agents.llm_cache.ChatOpenAI"):
+        
+        mock_grader.return_value.agrade = AsyncMock(side_effect=["yes", "no", "yes"])
+        
+        workflow = RAGWorkflow()
+        result = await workflow.grade_documents(
+            {"question": "q", "documents": ["doc1", "doc2", "doc3"]}
+        )
+        
+        assert result["documents"] == ["doc1", "doc3"]
+        assert result["web_search"] == "no"
+
+def test_rag_workflow_lazy_agents():
+    with patch("src.agents.langgraph_workflow.RouterAgent") as mock_router, \
+         patch("src.agents.langgraph_workflow.HybridSearchEngine") as mock_engine:
+        
+        workflow = RAGWorkflow()
+        mock_router.assert_not_called()
+        mock_engine.assert_not_called()
+        
+        # First access builds the agent, later accesses reuse it
+        assert workflow.router is workflow.router
+        mock_router.assert_called_once()
+
+def test_format_documents_joins_contents():
+    from src.agents.langgraph_workflow import format_documents
+    
+    formatted = format_documents(["doc 'one'", "doc two"])
+    assert formatted == "doc 'one'\n\n---\n\ndoc two"
+    assert "[" not in formatted
+
+def test_router_agent_memoizes_normalized_question():
+    with patch("src.agents.llm_cache.ChatOpenAI") as mock_llm:
+        mock_result = Mock()
+        mock_result.datasource = "web_search"
+        structured = mock_llm.return_value.with_structured_output.return_value
+        structured.invoke.return_value = mock_result
+        
+        agent = RouterAgent()
+        assert agent.route("Latest news?") == "web_search"
+        assert agent.route("  latest NEWS?  ") == "web_search"
+        assert structured.invoke.call_count == 1
+        
+        agent.clear_cache()
+        agent.route("Latest news?")
+        assert structured.invoke.call_count == 2
+
+def test_router_agent_routes_original_question():
+    with patch("src.agents.llm_cache.ChatOpenAI"):
+        agent = RouterAgent()
+        agent.router = Mock()
+        agent.router.invoke.return_value = Mock(datasource="vectorstore")
+        
+        agent.route("  What is the MTBF of the XR-7?  ")
+        agent.route("what is the mtbf of the xr-7?")
+        
+        # Only the cache key is normalized; the router sees the question as asked
+        agent.router.invoke.assert_called_once_with({"question": "  What is the MTBF of the XR-7?  "})
+
+def test_retrieval_grader_memoizes_grades():
+    with patch("src.agents.llm_cache.ChatOpenAI") as mock_llm:
+        mock_result = Mock()
+        mock_result.binary_score = "no"
+        structured = mock_llm.return_value.with_structured_output.return_value
+        structured.invoke.return_value = mock_result
+        
+        agent = RetrievalGrader()
+        assert agent.grade("question", "doc") == "no"
+        assert agent.grade("question", "doc") == "no"
+        assert structured.invoke.call_count == 1
+
+@pytest.mark.asyncio
+async def test_grade_generation_stops_at_max_iterations():
+    with patch("src.agents.langgraph_workflow.HallucinationGrader") as mock_grader, \
+         patch("src.agents.langgraph_workflow.settings") as mock_settings:
+        mock_settings.langgraph.max_iterations = 3
+        grader = mock_grader.return_value
+        grader.acheck_hallucination = AsyncMock(return_value="no")
+        grader.acheck_answer = AsyncMock(return_value="no")
+        
+        workflow = RAGWorkflow()
+        decision = await workflow.grade_generation_v_documents_and_question(
+            {"question": "q", "documents": ["doc"], "generation": "answer", "iterations": 3}
+        )
+        
+        assert decision == "useful"
+        grader.acheck_hallucination.assert_not_called()
+
+def test_get_workflow_returns_singleton():
+    from src.agents import langgraph_workflow
+    
+    with patch.object(langgraph_workflow, "_workflow_singleton", None):
+        first = langgraph_workflow.get_workflow()
+        assert langgraph_workflow.get_workflow() is first
@@ -14,3 +14,11 @@ async def test_analytics_agent_mock_mode():
     assert result["error"] is None
     assert result["code"] == "print('Mock code')"
 
+
+def test_analytics_agent_clean_code():
+    """Test markdown fences are stripped from generated code."""
+    agent = AnalyticsAgent()
+    
+    assert agent._clean_code("```python\nprint(1)\n```") == "print(1)"
+    assert agent._clean_code("  ```\nprint(2)\n```  ") == "print(2)"
+    assert agent._clean_code("print(3)") == "print(3)"
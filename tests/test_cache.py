@@ -71,7 +71,192 @@ async def test_cache_decorator():
     cache_key = client.generate_key("test", query="hello")
     assert client.mock_cache.get(cache_key) == {"result": "computed"}
     
-    # Second call - should return from cache
+    # Second call - should return cached JSON bytes directly
     result2 = await decorated_func(query="hello")
-    assert result2 == {"result": "computed"}
+    assert result2.media_type == "application/json"
+    assert json.loads(result2.body) == {"result": "computed"}
     assert mock_func.call_count == 1 # Should not increment
+
+def test_generate_key_is_prefixed_and_order_independent():
+    """Keys keep the prefix readable and ignore kwarg order."""
+    client = RedisClient()
+    
+    key = client.generate_key("search", query="hello", user_id="u1")
+    assert key.startswith("search:")
+    assert key == client.generate_key("search", user_id="u1", query="hello")
+    assert key != client.generate_key("search", query="other", user_id="u1")
+
+@pytest.mark.asyncio
+async def test_inflight_dedupe_coalesces_identical_queries():
+    """Concurrent identical queries share one computation."""
+    import asyncio
+    from src.cache.inflight import InflightDedupe
+    
+    dedupe = InflightDedupe()
+    calls = 0
+    
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"generation": "answer"}
+    
+    results = await asyncio.gather(
+        dedupe.run("What is RRF?", work),
+        dedupe.run("  what is rrf?", work),
+        dedupe.run("Something else", work),
+    )
+    
+    assert calls == 2
+    assert results[0] is results[1]
+    assert len(dedupe) == 0
+
+@pytest.mark.asyncio
+async def test_inflight_dedupe_survives_first_caller_cancellation():
+    """Cancelling the caller that started the work does not fail the others."""
+    import asyncio
+    from src.cache.inflight import InflightDedupe
+    
+    dedupe = InflightDedupe()
+    
+    async def work():
+        await asyncio.sleep(0.02)
+        return "answer"
+    
+    first = asyncio.create_task(dedupe.run("What is RRF?", work))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(dedupe.run("what is rrf?", work))
+    await asyncio.sleep(0.005)
+    first.cancel()
+    
+    assert await second == "answer"
+    assert first.cancelled()
+
+def test_dumps_serializes_pydantic_models():
+    """Pydantic payloads are encoded straight to JSON bytes."""
+    import orjson
+    from src.api.models import SearchResponse
+    from src.cache.redis_client import dumps
+    
+    response = SearchResponse(answer="a", documents=[], sources=[], confidence="high", query_id="q1")
+    assert orjson.loads(dumps(response)) == response.model_dump()
+    assert dumps({"foo": "bar"}) == b'{"foo":"bar"}'
+
+@pytest.mark.asyncio
+async def test_redis_client_l1_cache():
+    """Repeat reads are served from the in-process L1 cache."""
+    settings.features.mock_mode = False
+    
+    client = RedisClient()
+    client.l1_cache.clear()
+    client.client = AsyncMock()
+    client.client.get.return_value = b'{"data": "cached"}'
+    
+    assert await client.get("hot_key") == {"data": "cached"}
+    assert await client.get("hot_key") == {"data": "cached"}
+    client.client.get.assert_called_once_with("hot_key")
+    
+    # Writes go through to L1 as well
+    await client.set("new_key", {"data": "new"}, ttl=3600)
+    assert await client.get_raw("new_key") == b'{"data":"new"}'
+    client.client.get.assert_called_once()
+    
+    client.client = None
+    client.l1_cache.clear()
+
+@pytest.mark.asyncio
+async def test_embedding_cache_reuses_vectors():
+    """Repeat and near-repeat queries are embedded only once."""
+    from src.cache.embedding_cache import EmbeddingCache
+    
+    settings.features.mock_mode = True
+    RedisClient().mock_cache = {}
+    
+    embeddings = MagicMock()
+    embeddings.model = "text-embedding-3-small"
+    embeddings.aembed_query = AsyncMock(return_value=[0.1, 0.2, 0.3])
+    cache = EmbeddingCache(embeddings)
+    
+    assert await cache.embed("What is RRF?") == [0.1, 0.2, 0.3]
+    assert await cache.embed("  what is rrf? ") == [0.1, 0.2, 0.3]
+    embeddings.aembed_query.assert_called_once_with("What is RRF?")
+    assert cache.make_key("What is RRF?").startswith("emb:text-embedding-3-small:")
+
+def test_response_cache_middleware_serves_hits_before_routing():
+    """Cache hits are answered by the middleware without running the endpoint."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from src.cache.middleware import ResponseCacheMiddleware
+    
+    settings.features.mock_mode = True
+    RedisClient().mock_cache = {}
+    
+    auth_handler = MagicMock()
+    auth_handler.decode_token.return_value = {"sub": "u1"}
+    calls = 0
+    
+    app = FastAPI()
+    app.add_middleware(ResponseCacheMiddleware, auth_handler=auth_handler, paths=["/search"], ttl=60, prefix="test")
+    
+    @app.post("/search")
+    async def search(payload: dict):
+        nonlocal calls
+        calls += 1
+        return {"answer": payload["query"]}
+    
+    client = TestClient(app)
+    headers = {"Authorization": "Bearer token"}
+    
+    first = client.post("/search", json={"query": "hello"}, headers=headers)
+    second = client.post("/search", json={"query": "hello"}, headers=headers)
+    
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == {"answer": "hello"}
+    assert calls == 1
+    
+    # Unauthenticated requests bypass the cache entirely
+    third = client.post("/search", json={"query": "hello"})
+    assert "x-cache" not in third.headers
+    assert calls == 2
+
+@pytest.mark.asyncio
+async def test_query_frequency_scales_ttl():
+    """Hot queries get longer TTLs, capped at the configured maximum."""
+    from src.cache.query_frequency import QueryFrequency
+    
+    settings.features.mock_mode = True
+    freq = QueryFrequency()
+    
+    for _ in range(3):
+        count = await freq.record("  What is RRF?")
+    assert count == 3
+    assert await freq.record("what is rrf?", increment=0) == 3
+    assert await freq.top_queries(1) == ["what is rrf?"]
+    
+    assert freq.ttl_for(1) == settings.redis.ttl
+    assert freq.ttl_for(3) == settings.redis.ttl * 2
+    assert freq.ttl_for(10**9) == settings.redis.adaptive_ttl_max
+
+@pytest.mark.asyncio
+async def test_query_frequency_top_queries_spans_both_windows():
+    """Top queries merge the current and previous hour, as record() counts them."""
+    from src.cache.query_frequency import QueryFrequency
+    
+    settings.features.mock_mode = False
+    freq = QueryFrequency()
+    # RedisClient is a singleton; restore its connection afterwards
+    original_client = freq.redis_client.client
+    try:
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(return_value=[2, [b"what is rrf?"], 1])
+        freq.redis_client.client = MagicMock()
+        freq.redis_client.client.pipeline.return_value.__aenter__.return_value = pipe
+        
+        assert await freq.top_queries(5) == ["what is rrf?"]
+        merged, windows = pipe.zunionstore.call_args.args
+        assert windows == [freq._window_key(), freq._window_key(1)]
+        pipe.zrevrange.assert_called_once_with(merged, 0, 4)
+    finally:
+        freq.redis_client.client = original_client
+        settings.features.mock_mode = True
@@ -14,6 +14,35 @@ async def test_graph_extractor_mock_mode():
     assert "entities" in result
     assert result["entities"][0]["name"] == "MockEntity"
 
+@pytest.mark.asyncio
+async def test_graph_extractor_caches_results(tmp_path):
+    """Repeated text is served from the extraction cache unless forced."""
+    from src.graph.extraction_cache import ExtractionCache
+    
+    settings.features.mock_mode = False
+    try:
+        extractor = GraphExtractor()
+        extractor.cache = ExtractionCache("test-model", cache_path=str(tmp_path / "graph.sqlite3"))
+        extraction = {"entities": [{"name": "Milvus", "type": "TECHNOLOGY"}], "relationships": []}
+        extractor.chain = AsyncMock()
+        extractor.chain.ainvoke.return_value = extraction
+        
+        assert await extractor.extract("Milvus stores vectors.") == extraction
+        assert await extractor.extract("Milvus stores vectors.") == extraction
+        assert extractor.chain.ainvoke.call_count == 1
+        
+        await extractor.extract("Milvus stores vectors.", force=True)
+        assert extractor.chain.ainvoke.call_count == 2
+        
+        # Query-time extractions are kept in memory only
+        await extractor.extract("Which database stores vectors?", persist=False)
+        assert await extractor.extract("Which database stores vectors?", persist=False) == extraction
+        assert extractor.chain.ainvoke.call_count == 3
+        rows = extractor.cache._connection().execute("SELECT COUNT(*) FROM extractions").fetchone()
+        assert rows[0] == 1
+    finally:
+        settings.features.mock_mode = True
+
 @pytest.mark.asyncio
 async def test_neo4j_client_mock_mode():
     """Test Neo4j client in mock mode."""
@@ -23,11 +52,37 @@ async def test_neo4j_client_mock_mode():
     # Should not raise exceptions
     await client.add_entity("CONCEPT", "Test")
     await client.add_relationship("Test", "Other", "RELATED_TO")
+    await client.add_entities([{"label": "CONCEPT", "name": "Test"}])
+    await client.add_relationships([{"source": "Test", "target": "Other", "type": "RELATED_TO"}])
     
     results = await client.query_subgraph("Test")
     assert len(results) > 0
     assert results[0]["source"] == "Test"
 
+@pytest.mark.asyncio
+async def test_query_subgraph_clamps_depth_and_parameterizes_name():
+    """Depth is bounded in the query text; the entity name is only ever a parameter."""
+    settings.features.mock_mode = False
+    try:
+        client = Neo4jClient()
+        result = AsyncMock()
+        result.data.return_value = []
+        session = AsyncMock()
+        session.run.return_value = result
+        client.driver = MagicMock()
+        client.driver.session.return_value.__aenter__.return_value = session
+        
+        await client.query_subgraph("x}) DETACH DELETE n //", depth=99)
+        
+        query, = session.run.call_args.args
+        assert "[*1..3]" in query
+        assert "RETURN DISTINCT" in query
+        assert "DETACH" not in query
+        assert session.run.call_args.kwargs["name"] == "x}) DETACH DELETE n //"
+        assert session.run.call_args.kwargs["limit"] == 50
+    finally:
+        settings.features.mock_mode = True
+
 @pytest.mark.asyncio
 async def test_ingestion_pipeline_graph_integration():
     """Test that pipeline calls graph extractor and neo4j."""
@@ -47,7 +102,7 @@ async def test_ingestion_pipeline_graph_integration():
         mock_chunker = mock_chunker_cls.return_value
         mock_chunk = MagicMock()
         mock_chunk.content = "Chunk content"
-        mock_chunk.metadata = {"level": "parent"}
+        mock_chunk.metadata = {"type": "parent"}
         mock_chunker.hierarchical_chunking.return_value = [mock_chunk]
         
         mock_extractor = mock_extractor_cls.return_value
@@ -57,8 +112,8 @@ async def test_ingestion_pipeline_graph_integration():
         })
         
         mock_neo4j = mock_neo4j_cls.return_value
-        mock_neo4j.add_entity = AsyncMock()
-        mock_neo4j.add_relationship = AsyncMock()
+        mock_neo4j.add_entities = AsyncMock()
+        mock_neo4j.add_relationships = AsyncMock()
         
         # Run pipeline
         from src.ingestion.pipeline import IngestionPipeline
@@ -69,5 +124,9 @@ async def test_ingestion_pipeline_graph_integration():
         assert result["graph_stats"]["nodes"] == 1
         assert result["graph_stats"]["edges"] == 1
         mock_extractor.extract.assert_called()
-        mock_neo4j.add_entity.assert_called()
-        mock_neo4j.add_relationship.assert_called()
+        mock_neo4j.add_entities.assert_called_once_with(
+            [{"label": "T1", "name": "E1", "properties": {"source_doc": "test.pdf"}}]
+        )
+        mock_neo4j.add_relationships.assert_called_once_with(
+            [{"source": "E1", "target": "E2", "type": "R1"}]
+        )
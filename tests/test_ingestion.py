@@ -2,6 +2,7 @@
 Unit tests for data ingestion components.
 """
 
+import numpy as np
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from src.ingestion.docling_parser import DoclingParser
@@ -50,6 +51,21 @@ def test_chunking_strategy_hierarchical(mock_embeddings):
     
     # Check hierarchy linkage
     assert children[0].parent_id is not None
+    
+    # IDs are derived from content, so they are stable across runs
+    again = strategy.hierarchical_chunking(SAMPLE_MARKDOWN, {"filename": "test.pdf"})
+    assert [c.chunk_id for c in again] == [c.chunk_id for c in chunks]
+
+def test_fast_split_respects_size_and_overlap():
+    text = " ".join(f"w{i}" for i in range(400))
+    chunks = ChunkingStrategy._fast_split(text, 100, 30)
+    
+    assert all(len(c) <= 100 for c in chunks)
+    # Chunks end on word boundaries and consecutive chunks overlap
+    assert chunks[0].endswith("w26")
+    assert chunks[1].startswith("w20 ")
+    assert chunks[-1].endswith("w399")
+    assert ChunkingStrategy._fast_split("short text", 100, 30) == ["short text"]
 
 @pytest.mark.asyncio
 async def test_ingestion_pipeline(mock_docling, mock_embeddings):
@@ -69,3 +85,47 @@ async def test_ingestion_pipeline(mock_docling, mock_embeddings):
         
     assert result["status"] == "success"
     assert result["chunks_count"] > 0
+
+@pytest.mark.asyncio
+async def test_embed_many_deduplicates_across_documents(mock_embeddings):
+    from unittest.mock import AsyncMock
+    
+    strategy = ChunkingStrategy()
+    strategy.embeddings.aembed_documents = AsyncMock(side_effect=lambda texts: [[float(len(t))] for t in texts])
+    
+    doc_a = [Chunk(content="shared", metadata={}, chunk_id="a1"), Chunk(content="only a", metadata={}, chunk_id="a2")]
+    doc_b = [Chunk(content="shared", metadata={}, chunk_id="b1")]
+    
+    await strategy.embed_many([doc_a, doc_b])
+    
+    strategy.embeddings.aembed_documents.assert_called_once_with(["shared", "only a"])
+    assert doc_a[0].embedding.tolist() == doc_b[0].embedding.tolist() == [6.0]
+    assert doc_a[1].embedding.dtype == np.float16
+    assert doc_a[1].embedding_f32.tolist() == [6.0]
+
+def test_cached_embedder_only_embeds_misses(tmp_path):
+    from src.ingestion.embedding_cache import CachedEmbedder
+    
+    model = MagicMock()
+    model.model = "test-model"
+    model.embed_documents.side_effect = lambda texts: [[0.5, 0.25] for _ in texts]
+    embedder = CachedEmbedder(model, cache_path=str(tmp_path / "emb.sqlite3"))
+    
+    assert embedder.embed_documents(["a", "b", "a"]) == [[0.5, 0.25]] * 3
+    model.embed_documents.assert_called_once_with(["a", "b"])
+    
+    # A fresh instance reads the persisted vectors
+    model.embed_documents.reset_mock()
+    embedder = CachedEmbedder(model, cache_path=str(tmp_path / "emb.sqlite3"))
+    assert embedder.embed_documents(["b", "c"]) == [[0.5, 0.25]] * 2
+    model.embed_documents.assert_called_once_with(["c"])
+
+def test_semantic_boundary_chunking_splits_on_low_similarity(mock_embeddings):
+    strategy = ChunkingStrategy()
+    strategy.embeddings = MagicMock()
+    # Unnormalized vectors: the first two point the same way, the third is orthogonal
+    strategy.embeddings.embed_documents.return_value = [[2.0, 0.0], [5.0, 0.0], [0.0, 3.0]]
+    
+    chunks = strategy.semantic_boundary_chunking("One. Two. Three.", threshold=0.6)
+    
+    assert chunks == ["One. Two.", "Three."]
@@ -73,3 +73,79 @@ def test_feedback_endpoint(mock_auth, mock_services):
     
     assert response.status_code == 200
     assert response.json()["status"] == "success"
+    
+    # Feedback is queued for the background flusher, not written inline
+    _, _, _, mock_snow = mock_services
+    mock_snow.queue_feedback.assert_called_once()
+    mock_snow.log_feedback.assert_not_called()
+
+def test_search_stream_endpoint(mock_auth, mock_services):
+    mock_rag, _, _, _ = mock_services
+    
+    async def fake_stream(question):
+        yield {"type": "generation_start"}
+        yield {"type": "token", "content": "Test "}
+        yield {"type": "token", "content": "answer"}
+        yield {"type": "final", "generation": "Test answer", "documents": ["Test doc 1"]}
+    
+    mock_rag.astream_answer = fake_stream
+    
+    response = client.post(
+        "/search/stream",
+        json={"query": "test query"},
+        headers={"Authorization": "Bearer test-token"}
+    )
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [line for line in response.text.splitlines() if line.startswith("data: ")]
+    assert len(events) == 4
+    assert '"Test answer"' in events[-1]
+
+def test_cache_preload_endpoint(mock_auth, mock_services):
+    mock_rag, _, _, _ = mock_services
+    
+    response = client.post(
+        "/cache/preload",
+        json={"queries": ["first query", "second query", "first query"]},
+        headers={"Authorization": "Bearer test-token"}
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["requested"] == 3
+    assert data["warmed"] == 2  # Duplicates are only executed once
+
+@pytest.mark.asyncio
+async def test_voice_query_retracts_rejected_draft():
+    import asyncio
+    from unittest.mock import AsyncMock
+    from src.api.websocket_server import VoiceWebSocketManager
+    
+    manager = VoiceWebSocketManager()
+    
+    async def fake_stream(question):
+        yield {"type": "generation_start"}
+        yield {"type": "token", "content": "Rejected draft. More"}
+        await asyncio.sleep(0.01)  # Let the speaker start on the draft
+        yield {"type": "generation_start"}
+        yield {"type": "token", "content": "Good answer. Second sentence."}
+        yield {"type": "final", "generation": "Good answer. Second sentence.", "documents": []}
+    
+    spoken = []
+    
+    async def fake_synthesize(text, voice_id):
+        spoken.append(text)
+        yield b"audio"
+    
+    manager.rag_workflow = MagicMock(astream_answer=fake_stream)
+    manager.tts_service = MagicMock(synthesize_stream=fake_synthesize)
+    manager._send_message = AsyncMock()
+    session_state = MagicMock(session_id="s1")
+    
+    await manager._handle_query(MagicMock(), session_state, {"query": "q"})
+    
+    # The draft was spoken speculatively, then retracted before the graded answer
+    assert spoken == ["Rejected draft.", "Good answer.", "Second sentence."]
+    statuses = [call.args[3].get("status") for call in manager._send_message.call_args_list]
+    assert statuses.index("retracted") < statuses.index("generating_speech") < statuses.index("complete")
@@ -65,6 +65,25 @@ class TestModelRouter:
         complex_complexity = router._estimate_complexity(complex_query)
         assert complex_complexity > 0.5
     
+    async def test_health_probes_are_cached(self):
+        """Health is re-probed only once the cached result is stale"""
+        router = ModelRouter()
+        ollama_check = AsyncMock(return_value=True)
+        router._health_checks[ModelProvider.OLLAMA] = ollama_check
+        router._health_checks[ModelProvider.LOCALAI] = AsyncMock(return_value=False)
+        
+        await router.initialize()
+        try:
+            assert router._provider_health[ModelProvider.OLLAMA] is True
+            
+            await router._ensure_fresh(ModelProvider.OLLAMA)
+            ollama_check.assert_awaited_once()
+            
+            await router._ensure_fresh(ModelProvider.OLLAMA, ttl=0.0)
+            assert ollama_check.await_count == 2
+        finally:
+            await router.close()
+    
     @patch('src.llm.model_router.AsyncOpenAI')
     async def test_generate_openai(self, mock_openai):
         """Test generation with OpenAI"""
@@ -105,3 +124,16 @@ class TestModelRouter:
         )
         
         assert result == "Fallback response"
+
+
+@pytest.mark.asyncio
+async def test_coalesce_merges_small_deltas():
+    """Token deltas are merged up to the size limit and the tail is flushed"""
+    from src.llm.streaming import coalesce
+    
+    async def tokens():
+        for token in ["a", "b", "c", "d", "e"]:
+            yield token
+    
+    chunks = [chunk async for chunk in coalesce(tokens(), max_chars=2, max_delay=60)]
+    assert chunks == ["ab", "cd", "e"]
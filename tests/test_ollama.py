@@ -2,9 +2,11 @@
 Tests for Ollama client.
 """
 
+import orjson
 import pytest
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from src.llm.ollama_client import OllamaClient
+from src.llm.prompt_optimizer import PromptOptimizer
 
 
 @pytest.mark.asyncio
@@ -21,12 +23,24 @@ class TestOllamaClient:
         assert client.base_url == "http://localhost:11434"
         assert client.model == "llama3"
     
+    async def test_clients_share_connection_pool(self):
+        """Test instances for the same server reuse one HTTP client"""
+        first = OllamaClient(base_url="http://localhost:11434/")
+        second = OllamaClient(base_url="http://localhost:11434")
+        other = OllamaClient(base_url="http://ollama:11434")
+        
+        assert first.client is second.client
+        assert first.client is not other.client
+        
+        await OllamaClient.shutdown()
+        assert first.client.is_closed
+    
     @patch('httpx.AsyncClient.post')
     async def test_generate(self, mock_post):
         """Test text generation"""
         # Mock response
         mock_response = AsyncMock()
-        mock_response.json.return_value = {"response": "This is a test response"}
+        mock_response.content = orjson.dumps({"response": "This is a test response"})
         mock_response.raise_for_status = AsyncMock()
         mock_post.return_value = mock_response
         
@@ -40,9 +54,9 @@ class TestOllamaClient:
     async def test_chat(self, mock_post):
         """Test chat completion"""
         mock_response = AsyncMock()
-        mock_response.json.return_value = {
+        mock_response.content = orjson.dumps({
             "message": {"content": "Chat response"}
-        }
+        })
         mock_response.raise_for_status = AsyncMock()
         mock_post.return_value = mock_response
         
@@ -54,17 +68,46 @@ class TestOllamaClient:
         
         assert result == "Chat response"
     
+    async def test_system_prompt_prefix_is_stable(self):
+        """Test requests sharing a system prompt send identical raw prefixes"""
+        client = OllamaClient(model="llama3")
+        first = client._generate_payload("First question", None, "You are concise.", 0.0, None, False, {})
+        second = client._generate_payload("Second question", None, "You are concise.", 0.0, None, False, {})
+        
+        prefix, _ = PromptOptimizer.build("llama3", "You are concise.", "First question")
+        assert first["raw"] is True
+        assert first["prompt"].startswith(prefix)
+        assert second["prompt"].startswith(prefix)
+        assert first["options"]["num_keep"] == PromptOptimizer.estimate_tokens(prefix)
+        
+        generic = client._generate_payload("Hi", "tinyllm", "You are concise.", 0.0, None, False, {})
+        assert generic["system"] == "You are concise."
+        assert "raw" not in generic
+    
+    async def test_ndjson_stream_parsing(self):
+        """Test frames split across chunks are reassembled"""
+        async def aiter_bytes(chunk_size):
+            for chunk in (b'{"response": "Hel', b'lo"}\n{"response": " world"}\n\n', b'{"done": true}'):
+                yield chunk
+        
+        response = MagicMock()
+        response.aiter_bytes = aiter_bytes
+        
+        frames = [data async for data in OllamaClient._iter_ndjson(response)]
+        
+        assert frames == [{"response": "Hello"}, {"response": " world"}, {"done": True}]
+    
     @patch('httpx.AsyncClient.get')
     async def test_list_models(self, mock_get):
         """Test listing available models"""
         mock_response = AsyncMock()
-        mock_response.json.return_value = {
+        mock_response.content = orjson.dumps({
             "models": [
                 {"name": "llama3"},
                 {"name": "phi3"},
                 {"name": "mistral"}
             ]
-        }
+        })
         mock_response.raise_for_status = AsyncMock()
         mock_get.return_value = mock_response
         
@@ -73,6 +73,17 @@ class TestPIIMasker:
         assert "6467" in masked_text
         assert "4532148803436467" not in masked_text
     
+    def test_masking_hash_strategy(self):
+        """Test HASH masking strategy is deterministic"""
+        masker = PIIMasker(strategy=MaskingStrategy.HASH)
+        text = "Email test@example.com twice: test@example.com"
+        masked_text, entities = masker.mask_text(text)
+        
+        assert "test@example.com" not in masked_text
+        assert entities[0].replacement == entities[1].replacement
+        assert entities[0].replacement.startswith("[EMAIL_")
+        assert len(entities[0].replacement) == len("[EMAIL_]") + 8
+    
     def test_unmask_text(self):
         """Test unmasking functionality"""
         text = "Contact: test@example.com"
@@ -93,6 +104,17 @@ class TestPIIMasker:
         assert "john@example.com" not in masked_query
         assert "john@example.com" not in masked_response
     
+    def test_literal_detection(self):
+        """Test registered literals are detected as whole words"""
+        self.masker.add_literals(["Ann Lee", "Ann", "db-prod-01"], PIIType.PERSON_NAME)
+        text = "Ann Lee said the Annual report is on db-prod-01."
+        entities = self.masker.detect_pii(text)
+        
+        assert [(e.type, e.text) for e in entities] == [
+            (PIIType.PERSON_NAME, "Ann Lee"),
+            (PIIType.PERSON_NAME, "db-prod-01"),
+        ]
+    
     def test_no_pii_in_text(self):
         """Test text with no PII"""
         text = "This is a normal sentence without any sensitive information."
@@ -109,6 +131,32 @@ class TestPIIMasker:
         assert PIIType.EMAIL in types
         assert PIIType.PHONE in types
         assert PIIType.SSN in types
+    
+    def test_single_scan_matches_per_type_patterns(self):
+        """Combined pattern finds the same spans as the per-type patterns"""
+        text = "Mail a@b.io from 10.0.0.1, see https://example.com/docs, SSN 123-45-6789"
+        entities = self.masker.detect_pii(text)
+        
+        expected = sorted(
+            (m.start(), m.end(), pii_type)
+            for pii_type, pattern in PIIMasker.COMPILED_PATTERNS.items()
+            for m in pattern.finditer(text)
+        )
+        assert [(e.start, e.end, e.type) for e in entities] == expected
+
+
+@pytest.mark.asyncio
+async def test_async_query_response_masking_offloads_large_inputs():
+    """Test async masking matches the sync result on both paths"""
+    masker = PIIMasker()
+    query = "My email is user@example.com"
+    
+    for response in ("Sent to user@example.com", "Sent to user@example.com. " * 5000):
+        expected = masker.mask_query_response(query, response)
+        masked_query, masked_response, _ = await masker.amask_query_response(query, response)
+        
+        assert (masked_query, masked_response) == expected[:2]
+        assert "user@example.com" not in masked_response
 
 
 @pytest.mark.asyncio
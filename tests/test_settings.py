@@ -0,0 +1,53 @@
+import pytest
+from pydantic import ValidationError
+
+from config.settings import Settings, LLMSettings, HybridSearchSettings, PostgresSettings, load_settings
+
+
+def test_load_settings_fast_path(tmp_path, monkeypatch):
+    """Second load with the same environment is served from the snapshot."""
+    cache_path = tmp_path / "settings.json"
+    monkeypatch.setenv("SETTINGS_FAST_LOAD", "1")
+    monkeypatch.setenv("SETTINGS_CACHE_PATH", str(cache_path))
+    
+    first = load_settings()
+    assert cache_path.exists()
+    
+    second = load_settings()
+    assert isinstance(second, Settings)
+    assert isinstance(second.llm, LLMSettings)
+    assert second.llm.openai_model == first.llm.openai_model
+    assert second.hybrid_search.top_k_results == first.hybrid_search.top_k_results
+
+
+def test_load_settings_invalidated_by_env_change(tmp_path, monkeypatch):
+    monkeypatch.setenv("SETTINGS_FAST_LOAD", "1")
+    monkeypatch.setenv("SETTINGS_CACHE_PATH", str(tmp_path / "settings.json"))
+    load_settings()
+    
+    monkeypatch.setenv("TOP_K_RESULTS", "9")
+    assert load_settings().hybrid_search.top_k_results == 9
+
+
+def test_hybrid_search_weights_bounded(monkeypatch):
+    monkeypatch.setenv("SEMANTIC_WEIGHT", "1.5")
+    with pytest.raises(ValidationError):
+        HybridSearchSettings()
+
+
+def test_postgres_database_url_computed_once():
+    postgres = PostgresSettings(postgres_user="u", postgres_password="p", postgres_host="h", postgres_db="d")
+    assert postgres.database_url == "postgresql://u:p@h:5432/d"
+    assert postgres.database_url is postgres.database_url
+
+
+def test_sections_read_cached_dotenv(monkeypatch):
+    from config import settings as settings_module
+    
+    monkeypatch.delenv("OLLAMA_MODEL", raising=False)
+    monkeypatch.setitem(settings_module.DOTENV_VALUES, "ollama_model", "phi3")
+    assert settings_module.LocalLLMSettings().ollama_model == "phi3"
+    
+    # Real environment variables still take precedence over .env
+    monkeypatch.setenv("OLLAMA_MODEL", "mistral")
+    assert settings_module.LocalLLMSettings().ollama_model == "mistral"
@@ -31,3 +31,62 @@ async def test_vlm_client_real_call():
         
         assert caption == "A detailed description of the chart."
         mock_llm.ainvoke.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_vlm_client_caches_captions_by_content(tmp_path):
+    """Repeated images are captioned once, and the cache survives a restart."""
+    settings.features.mock_mode = False
+    
+    try:
+        with patch("src.ingestion.vlm_client.ChatOpenAI") as mock_llm_cls:
+            mock_llm = AsyncMock()
+            mock_llm_cls.return_value = mock_llm
+            mock_llm.ainvoke.return_value = MagicMock(content="A bar chart.")
+            
+            client = VLMClient()
+            client.cache_path = tmp_path / "captions.json"
+            assert await client.generate_caption("aW1hZ2U=") == "A bar chart."
+            assert await client.generate_caption("aW1hZ2U=") == "A bar chart."
+            mock_llm.ainvoke.assert_called_once()
+            
+            await client.persist()
+            restarted = VLMClient()
+            restarted.cache_path = tmp_path / "captions.json"
+            assert await restarted.generate_caption("aW1hZ2U=") == "A bar chart."
+            mock_llm.ainvoke.assert_called_once()
+    finally:
+        settings.features.mock_mode = True
+
+@pytest.mark.asyncio
+async def test_vlm_client_accepts_raw_bytes(tmp_path):
+    """Raw image bytes are base64-encoded once, into a data URL with the right type."""
+    settings.features.mock_mode = False
+    
+    try:
+        with patch("src.ingestion.vlm_client.ChatOpenAI") as mock_llm_cls:
+            mock_llm = AsyncMock()
+            mock_llm_cls.return_value = mock_llm
+            mock_llm.ainvoke.return_value = MagicMock(content="A logo.")
+            
+            client = VLMClient()
+            client.cache_path = tmp_path / "captions.json"
+            assert await client.generate_caption(b"\x89PNG\r\n\x1a\nrest") == "A logo."
+            
+            message = mock_llm.ainvoke.call_args.args[0][0]
+            assert message.content[1]["image_url"]["url"] == "data:image/png;base64,iVBORw0KGgpyZXN0"
+            
+            # The same image as base64 text hits the same cache entry
+            assert await client.generate_caption("iVBORw0KGgpyZXN0") == "A logo."
+            mock_llm.ainvoke.assert_called_once()
+    finally:
+        settings.features.mock_mode = True
+
+def test_vlm_client_mock_mode_skips_model_client():
+    """No chat model is built in mock mode."""
+    settings.features.mock_mode = True
+    
+    with patch("src.ingestion.vlm_client.ChatOpenAI") as mock_llm_cls:
+        client = VLMClient()
+        
+        assert client.llm is None
+        mock_llm_cls.assert_not_called()